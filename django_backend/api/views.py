@@ -4,9 +4,11 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from rest_framework import status
+from lillies_backend.idempotency import idempotent
 
 
 @api_view(["POST"])
+@idempotent("order-confirmation")
 def send_order_confirmation(request):
     try:
         order_details = request.data.get("orderDetails")
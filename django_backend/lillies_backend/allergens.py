@@ -0,0 +1,89 @@
+import re
+
+from django.utils.text import slugify
+
+from .models import Allergen, Product
+
+# Common spellings mapped onto one canonical allergen slug
+ALIASES = {
+    'peanuts': 'peanut',
+    'groundnut': 'peanut',
+    'groundnuts': 'peanut',
+    'milk': 'dairy',
+    'lactose': 'dairy',
+    'cheese': 'dairy',
+    'butter': 'dairy',
+    'eggs': 'egg',
+    'nuts': 'tree-nut',
+    'tree-nuts': 'tree-nut',
+    'wheat': 'gluten',
+    'soya': 'soy',
+    'soybean': 'soy',
+    'soybeans': 'soy',
+    'crustaceans': 'shellfish',
+    'sesame-seeds': 'sesame',
+    'mustard-seeds': 'mustard',
+}
+
+_SEPARATORS = re.compile(r'[,;/\n]|\band\b|&', re.IGNORECASE)
+_NOISE = re.compile(r'\b(contains|may contain|traces of)\b', re.IGNORECASE)
+
+
+def normalize(name):
+    slug = slugify(name)
+    return ALIASES.get(slug, slug)
+
+
+def parse_allergens(text):
+    """
+    Split a free-text allergen list ("Peanuts, milk and eggs") into sorted
+    canonical slugs (["dairy", "egg", "peanut"])
+    """
+    if not text:
+        return []
+    slugs = set()
+    for part in _SEPARATORS.split(_NOISE.sub(' ', text)):
+        slug = normalize(part.strip())
+        if slug:
+            slugs.add(slug)
+    return sorted(slugs)
+
+
+def _allergens_for(slugs):
+    existing = {allergen.slug: allergen for allergen in Allergen.objects.filter(slug__in=slugs)}
+    missing = [
+        Allergen(slug=slug, name=slug.replace('-', ' ').title())
+        for slug in slugs if slug not in existing
+    ]
+    if missing:
+        Allergen.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {allergen.slug: allergen for allergen in Allergen.objects.filter(slug__in=slugs)}
+    return existing
+
+
+def sync_products(products):
+    """
+    Rebuild the normalized allergen rows for ``products`` from their free text
+    """
+    parsed = {product.pk: parse_allergens(product.allergens) for product in products}
+    if not parsed:
+        return
+    allergens = _allergens_for({slug for slugs in parsed.values() for slug in slugs})
+
+    Through = Product.allergen_tags.through
+    Through.objects.filter(product_id__in=parsed.keys()).delete()
+    Through.objects.bulk_create([
+        Through(product_id=product_id, allergen_id=allergens[slug].pk)
+        for product_id, slugs in parsed.items()
+        for slug in slugs
+    ])
+
+
+def allergen_ids(slugs):
+    """
+    Resolve user supplied names to Allergen ids, ignoring unknown ones
+    """
+    return list(
+        Allergen.objects.filter(slug__in={normalize(slug) for slug in slugs if slug.strip()})
+        .values_list('id', flat=True)
+    )
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LilliesBackendConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'lillies_backend'
+
+    def ready(self):
+        # Register model signal handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+AVAILABILITY_KEY = 'menu:availability'
+# Other processes see a stock change after at most this many seconds
+AVAILABILITY_CACHE_TIMEOUT = getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 5)
+
+
+def stock_levels():
+    """
+    Return (digest, {product_id: (stock, available_stock)}) for the active
+    products. Stock moves with every hold and checkout, so it is kept out of
+    the cached menu payloads and laid over them from this small, briefly
+    cached map instead. Only live holds count: expired ones still in
+    Product.reserved until the next sweep do not hide stock from the menu.
+    """
+    levels = cache.get(AVAILABILITY_KEY)
+    if levels is None:
+        live = dict(
+            StockReservation.objects.filter(expires_at__gt=timezone.now())
+            .values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+        )
+        table = {
+            pk: (stock, max((stock or 0) - live.get(pk, 0), 0))
+            for pk, stock in Product.objects.filter(active=True).values_list('id', 'stock')
+        }
+        digest = hashlib.sha1(repr(sorted(table.items())).encode()).hexdigest()[:16]
+        levels = (digest, table)
+        cache.set(AVAILABILITY_KEY, levels, timeout=AVAILABILITY_CACHE_TIMEOUT)
+    return levels
+
+
+def invalidate():
+    cache.delete(AVAILABILITY_KEY)
+
+
+def overlay(products, levels=None):
+    """
+    Replace ``stock`` and ``available_stock`` in serialized products with the
+    current levels, in place
+    """
+    _, table = levels or stock_levels()
+    for product in products:
+        level = table.get(product.get('id'))
+        if level is None:
+            continue
+        if 'stock' in product:
+            product['stock'] = level[0]
+        if 'available_stock' in product:
+            product['available_stock'] = level[1]
+    return products
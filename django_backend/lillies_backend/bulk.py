@@ -0,0 +1,217 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Category, Product
+from .signals import products_bulk_changed
+
+# Columns accepted on import and emitted on export; rows are matched on sku
+PRODUCT_COLUMNS = [
+    'sku', 'name', 'description', 'price', 'category', 'active', 'stock',
+    'preparation_time', 'calories', 'ingredients', 'allergens', 'is_vegetarian',
+    'is_vegan', 'is_gluten_free', 'discount_price', 'is_featured',
+]
+UPDATE_FIELDS = [column for column in PRODUCT_COLUMNS if column != 'sku'] + ['updated_at']
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+_TRUE = {'1', 'true', 'yes', 'y', 't'}
+_FALSE = {'0', 'false', 'no', 'n', 'f'}
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError('Must be a boolean.')
+
+
+def _to_int(value):
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError('A valid integer is required.')
+    if number < 0:
+        raise ValueError('Must not be negative.')
+    return number
+
+
+def _to_price(value):
+    try:
+        price = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError('A valid number is required.')
+    if price < 0 or price >= Decimal('1e8'):
+        raise ValueError('Must be between 0 and 99999999.99.')
+    return price
+
+
+def _to_text(max_length=None):
+    def convert(value):
+        text = str(value).strip()
+        if max_length and len(text) > max_length:
+            raise ValueError(f'Ensure this field has no more than {max_length} characters.')
+        return text
+    return convert
+
+
+# column: (converter, default when the cell is empty; REQUIRED if mandatory)
+REQUIRED = object()
+COLUMN_RULES = {
+    'sku': (_to_text(100), REQUIRED),
+    'name': (_to_text(255), REQUIRED),
+    'description': (_to_text(), ''),
+    'price': (_to_price, REQUIRED),
+    'active': (_to_bool, True),
+    'stock': (_to_int, 0),
+    'preparation_time': (_to_int, 30),
+    'calories': (_to_int, None),
+    'ingredients': (_to_text(), None),
+    'allergens': (_to_text(), None),
+    'is_vegetarian': (_to_bool, False),
+    'is_vegan': (_to_bool, False),
+    'is_gluten_free': (_to_bool, False),
+    'discount_price': (_to_price, None),
+    'is_featured': (_to_bool, False),
+}
+
+
+def clean_row(row, categories):
+    """
+    Convert one raw row into Product field values. Returns (values, errors).
+    Plain converters are used instead of a DRF serializer because per-row
+    serializer validation dominates import time at tens of thousands of rows.
+    """
+    values = {}
+    errors = {}
+    for column, (convert, default) in COLUMN_RULES.items():
+        raw = row.get(column)
+        if raw is None or raw == '':
+            if default is REQUIRED:
+                errors[column] = ['This field is required.']
+            else:
+                values[column] = default
+            continue
+        try:
+            values[column] = convert(raw)
+        except ValueError as exc:
+            errors[column] = [str(exc)]
+
+    category = str(row.get('category') or '').strip().lower()
+    if category not in categories:
+        errors['category'] = [f'Unknown category "{row.get("category") or ""}"']
+    else:
+        values['category_id'] = categories[category]
+    return values, errors
+
+
+def _category_lookup():
+    lookup = {}
+    for pk, name in Category.objects.values_list('id', 'name'):
+        lookup[str(pk)] = pk
+        lookup[name.lower()] = pk
+    return lookup
+
+
+def read_rows(stream, file_type):
+    """
+    Yield one dict per row from a binary CSV or JSON Lines stream
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_type == 'csv':
+        yield from csv.DictReader(text)
+    elif file_type == 'jsonl':
+        for line in text:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f'Unsupported file type "{file_type}"')
+
+
+def _apply_batch(batch):
+    """
+    Upsert one validated batch by sku and return the affected product ids
+    """
+    products = [Product(**values) for values in batch.values()]
+    with transaction.atomic():
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=UPDATE_FIELDS,
+        )
+    return list(Product.objects.filter(sku__in=batch.keys()).values_list('id', flat=True))
+
+
+def import_products(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Validate and upsert product rows in batches. Invalid rows are reported
+    and skipped; valid rows in the same batch are still written.
+    """
+    categories = _category_lookup()
+    processed = 0
+    errors = []
+    error_count = 0
+    product_ids = []
+    batch = {}
+
+    for line, row in enumerate(rows, start=1):
+        processed += 1
+        values, row_errors = clean_row(row, categories)
+        if row_errors:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': line, 'sku': row.get('sku'), 'errors': row_errors})
+            continue
+        # Later rows for the same sku win, which also keeps each upsert conflict-free
+        batch[values['sku']] = values
+        if len(batch) >= batch_size:
+            product_ids.extend(_apply_batch(batch))
+            batch = {}
+
+    if batch:
+        product_ids.extend(_apply_batch(batch))
+
+    if product_ids:
+        products_bulk_changed.send(sender=Product, product_ids=product_ids)
+
+    return {
+        'processed': processed,
+        'imported': len(product_ids),
+        'error_count': error_count,
+        'errors': errors,
+    }
+
+
+def export_rows(queryset=None):
+    queryset = Product.objects.all() if queryset is None else queryset
+    columns = [column for column in PRODUCT_COLUMNS if column != 'category'] + ['category__name']
+    for values in queryset.order_by('id').values(*columns).iterator(chunk_size=2000):
+        values['category'] = values.pop('category__name')
+        yield values
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=PRODUCT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
@@ -0,0 +1,180 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Product, StockReservation
+
+MAX_CART_LINES = 50
+MAX_LINE_QUANTITY = 100
+PRICE_VERSION_KEY = 'cart:price-version'
+
+
+class CartError(Exception):
+    def __init__(self, message, product_ids=()):
+        super().__init__(message)
+        self.message = message
+        self.product_ids = sorted(product_ids)
+
+
+def _store():
+    return caches['carts']
+
+
+def _key(holder):
+    return f'cart:{holder}'
+
+
+def get_price_version():
+    """
+    Version of the product prices, names and availability carts are priced
+    from. Kept in the carts store so it is shared exactly as widely as the
+    carts are. A lost or evicted version reads as a new one, which only
+    costs a reprice.
+    """
+    store = _store()
+    version = store.get(PRICE_VERSION_KEY)
+    if version is None:
+        store.add(PRICE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = store.get(PRICE_VERSION_KEY)
+    return version
+
+
+def bump_price_version():
+    _store().set(PRICE_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _empty():
+    now = int(time.time())
+    return {'version': None, 'created': now, 'updated': now, 'lines': {}}
+
+
+def _price_lines(cart, product_ids):
+    """
+    Refresh name and unit price for ``product_ids`` from the catalog, dropping
+    lines whose product no longer exists or is inactive. Returns the dropped ids.
+    """
+    products = Product.objects.filter(pk__in=product_ids, active=True).only(
+        'id', 'name', 'price', 'discount_price'
+    ).in_bulk()
+    dropped = []
+    for product_id in product_ids:
+        product = products.get(product_id)
+        if product is None:
+            cart['lines'].pop(str(product_id), None)
+            dropped.append(product_id)
+            continue
+        line = cart['lines'][str(product_id)]
+        line[1] = str(product.final_price)
+        line[2] = product.name
+    return dropped
+
+
+def _load(holder):
+    """
+    Return the stored cart, repricing it only if a price changed since it was
+    last priced. Carts are compact ``{product_id: [quantity, unit_price,
+    name]}`` maps; nothing is written to the database until checkout.
+    """
+    cart = _store().get(_key(holder)) or _empty()
+    version = get_price_version()
+    if cart['lines'] and cart['version'] != version:
+        cart['dropped'] = cart.get('dropped', []) + _price_lines(cart, [int(pk) for pk in cart['lines']])
+        cart['version'] = version
+        _save(holder, cart)
+    return cart
+
+
+def _save(holder, cart):
+    cart['updated'] = int(time.time())
+    _store().set(_key(holder), cart, timeout=getattr(settings, 'CART_TTL', None))
+
+
+def serialize(cart):
+    lines = []
+    total = Decimal('0.00')
+    for product_id, (quantity, unit_price, name) in sorted(cart['lines'].items(), key=lambda item: int(item[0])):
+        line_total = Decimal(unit_price) * quantity
+        total += line_total
+        lines.append({
+            'product': int(product_id),
+            'name': name,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'line_total': str(line_total),
+        })
+    return {
+        'items': lines,
+        'total': str(total),
+        'item_count': sum(line['quantity'] for line in lines),
+        # Products removed from the cart because they left the menu
+        'unavailable': cart.get('dropped', []),
+        'updated_at': cart['updated'],
+    }
+
+
+def get_cart(holder):
+    return _load(holder)
+
+
+def set_line(holder, product_id, quantity):
+    """
+    Set the quantity of one product (0 removes it) and price just that line
+    """
+    cart = _load(holder)
+    key = str(product_id)
+    cart.pop('dropped', None)
+    if quantity == 0:
+        cart['lines'].pop(key, None)
+    else:
+        if key not in cart['lines'] and len(cart['lines']) >= MAX_CART_LINES:
+            raise CartError(f'A cart may hold at most {MAX_CART_LINES} different products')
+        cart['lines'][key] = [quantity, None, None]
+        if _price_lines(cart, [product_id]):
+            raise CartError('This product is unavailable', [product_id])
+        cart['version'] = cart['version'] or get_price_version()
+    _save(holder, cart)
+    return cart
+
+
+def clear(holder):
+    _store().delete(_key(holder))
+
+
+def items(cart):
+    """
+    The cart as checkout lines
+    """
+    return [{'product': int(pk), 'quantity': line[0]} for pk, line in cart['lines'].items()]
+
+
+def merge(from_holder, to_holder):
+    """
+    Fold an anonymous cart into the signed-in user's cart, adding quantities,
+    and hand its stock holds over where the user holds none of their own
+    """
+    if from_holder == to_holder:
+        return _load(to_holder)
+    source = _store().get(_key(from_holder))
+    if not source or not source['lines']:
+        return _load(to_holder)
+
+    cart = _load(to_holder)
+    added = []
+    for product_id, line in source['lines'].items():
+        if product_id in cart['lines']:
+            current = cart['lines'][product_id]
+            current[0] = min(current[0] + line[0], MAX_LINE_QUANTITY)
+        elif len(cart['lines']) < MAX_CART_LINES:
+            cart['lines'][product_id] = [line[0], None, None]
+            added.append(int(product_id))
+    if added:
+        cart['dropped'] = cart.get('dropped', []) + _price_lines(cart, added)
+    cart['version'] = cart['version'] or get_price_version()
+    _save(to_holder, cart)
+    clear(from_holder)
+
+    own = list(StockReservation.objects.filter(holder=to_holder).values_list('product_id', flat=True))
+    StockReservation.objects.filter(holder=from_holder).exclude(product_id__in=own).update(holder=to_holder)
+    return cart
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import F
+
+from . import availability, events, kitchen, slots
+from .models import Order, OrderItem, Product
+from .reservations import convert_holds, release_expired, user_holder
+
+MAX_CHECKOUT_LINES = 50
+
+
+class CheckoutError(Exception):
+    """
+    Raised when a cart cannot be ordered. ``product_ids`` names the offending
+    products and ``status`` is the HTTP status the API should answer with.
+    """
+
+    def __init__(self, message, product_ids=(), status=400):
+        super().__init__(message)
+        self.message = message
+        self.product_ids = sorted(product_ids)
+        self.status = status
+
+
+def merge_lines(items):
+    """
+    Collapse repeated products into one line each, ordered by product id so
+    concurrent checkouts always lock rows in the same order
+    """
+    quantities = {}
+    for item in items:
+        quantities[item['product']] = quantities.get(item['product'], 0) + item['quantity']
+    return OrderedDict(sorted(quantities.items()))
+
+
+def place_order(customer, items, pickup_at=None, **order_fields):
+    """
+    Price a cart from Product.final_price, reserve stock with conditional
+    UPDATEs and create the order with its items in one short transaction.
+    Stock is never read and written back: each decrement only succeeds while
+    enough units are available, so concurrent checkouts cannot oversell.
+
+    The customer's own stock holds are converted as part of the decrement:
+    units they already hold count towards their order instead of against it.
+
+    The order's preparation minutes are booked into the ``pickup_at`` slot,
+    or the earliest upcoming slot with room, and it is due at that slot.
+    """
+    lines = merge_lines(items)
+    if not lines:
+        raise CheckoutError('The cart is empty')
+    if len(lines) > MAX_CHECKOUT_LINES:
+        raise CheckoutError(f'A cart may hold at most {MAX_CHECKOUT_LINES} different products')
+
+    products = Product.objects.filter(pk__in=lines, active=True).only(
+        'id', 'name', 'price', 'discount_price', 'category_id', 'preparation_time'
+    ).in_bulk()
+    missing = set(lines) - set(products)
+    if missing:
+        raise CheckoutError('Some products are unavailable', missing)
+
+    total = sum(products[pk].final_price * quantity for pk, quantity in lines.items())
+
+    with transaction.atomic():
+        # Expired holds would otherwise count against the stock until the next sweep
+        release_expired(list(lines))
+        held = convert_holds(user_holder(customer), list(lines))
+        sold_out = [
+            pk for pk, quantity in lines.items()
+            if not Product.objects.filter(
+                pk=pk, active=True, stock__gte=F('reserved') - held.get(pk, 0) + quantity
+            ).update(
+                stock=F('stock') - quantity,
+                reserved=F('reserved') - held.get(pk, 0),
+            )
+        ]
+        if sold_out:
+            # Leaving the block with an exception undoes the decrements above
+            raise CheckoutError('Not enough stock', sold_out, status=409)
+
+        minutes = slots.order_minutes((products[pk].preparation_time, quantity) for pk, quantity in lines.items())
+        kitchen_lines = [
+            (products[pk].category_id, products[pk].preparation_time, quantity) for pk, quantity in lines.items()
+        ]
+        try:
+            # The slot cannot start before the kitchen gets through this
+            # order behind the ones already queued
+            slot = slots.book(minutes, pickup_at, ready_at=kitchen.ready_at(kitchen_lines))
+        except slots.SlotError as e:
+            raise CheckoutError(e.message, status=e.status)
+
+        order = Order.objects.create(
+            customer=customer,
+            total_amount=total,
+            pickup_slot=slot,
+            slot_minutes=minutes,
+            due_at=slot.starts_at,
+            **order_fields,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[pk], quantity=quantity, price=products[pk].final_price)
+            for pk, quantity in lines.items()
+        ])
+        # Stock reaches the menu through the availability overlay, not the cached payloads
+        transaction.on_commit(availability.invalidate)
+        transaction.on_commit(lambda: kitchen.order_placed(order, kitchen_lines))
+        events.products_sold_out(
+            Product.objects.filter(pk__in=list(lines), stock__lte=F('reserved')).values_list('id', 'name')
+        )
+    return order
@@ -0,0 +1,34 @@
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from . import availability, menu_cache
+
+
+def catalog_etag(request, *args, **kwargs):
+    raw = '|'.join([
+        # Bumped by every catalog save, delete and bulk change
+        str(menu_cache.get_menu_version()),
+        # Holds and checkouts change stock without bumping the version
+        availability.stock_levels()[0],
+        request.get_full_path(),
+    ])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# Decorators for views whose output depends only on the catalog tables. No
+# Last-Modified: a version number says nothing about when rows changed, and
+# deletions leave no updated_at behind. The ETag covers both.
+catalog_condition = condition(etag_func=catalog_etag)
+
+
+def catalog_conditional_methods(*names):
+    """
+    Class decorator applying ``catalog_condition`` to the named view methods
+    """
+    def decorate(cls):
+        for name in names:
+            cls = method_decorator(catalog_condition, name=name)(cls)
+        return cls
+    return decorate
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = 'lillies-events'
+# Events buffered per connected client before it is considered too slow
+QUEUE_SIZE = getattr(settings, 'EVENTS_QUEUE_SIZE', 100)
+
+ORDER_CREATED = 'order.created'
+ORDER_STATUS = 'order.status'
+PRODUCT_SOLD_OUT = 'product.sold_out'
+EVENT_TYPES = (ORDER_CREATED, ORDER_STATUS, PRODUCT_SOLD_OUT)
+
+
+class Subscription:
+    """
+    One connected client: an asyncio queue on the client's event loop, fed
+    from whichever thread publishes. ``accept(event)`` filters what it sees.
+    """
+
+    def __init__(self, loop, accept):
+        self.loop = loop
+        self.accept = accept
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Runs on the subscription's loop
+        if self.queue.full():
+            # Dropping events silently would leave the screen wrong; end the
+            # stream instead so the client reconnects and reloads
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    """
+    In-process fan-out to the subscriptions held by this worker
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, accept):
+        subscription = Subscription(asyncio.get_running_loop(), accept)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.accept(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The client's loop has shut down
+                self.unsubscribe(subscription)
+
+
+class LocalBackend:
+    """
+    Events only reach clients connected to the publishing process. Fine for
+    a single ASGI worker; use the redis backend when running several.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, event):
+        self.broker.dispatch(event)
+
+    def listen(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Fans events out to every worker through a Redis pub/sub channel. Each
+    worker that serves streams runs one listener thread relaying the channel
+    to its own broker.
+    """
+
+    def __init__(self, broker, url, channel=EVENTS_CHANNEL):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImproperlyConfigured('EVENTS_BACKEND = "redis" requires the redis package') from e
+        self.broker = broker
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def listen(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._relay, name='events-listener', daemon=True)
+                self._listener.start()
+
+    def _relay(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.broker.dispatch(json.loads(message['data']))
+            except Exception:
+                logger.exception('Event listener lost its Redis connection, reconnecting')
+                time.sleep(1)
+
+
+_broker = Broker()
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = getattr(settings, 'EVENTS_BACKEND', 'local')
+                if name == 'redis':
+                    _backend = RedisBackend(_broker, settings.EVENTS_URL)
+                elif name == 'local':
+                    _backend = LocalBackend(_broker)
+                else:
+                    raise ImproperlyConfigured(f'Unknown EVENTS_BACKEND {name!r}')
+    return _backend
+
+
+def subscribe(accept):
+    """
+    Register a client on the running event loop; pair with unsubscribe()
+    """
+    get_backend().listen()
+    return _broker.subscribe(accept)
+
+
+def unsubscribe(subscription):
+    _broker.unsubscribe(subscription)
+
+
+def _send(event):
+    try:
+        get_backend().publish(event)
+    except Exception:
+        # Pushing is best effort: clients resync over REST when they reconnect
+        logger.exception('Could not publish %s event', event['type'])
+
+
+def publish(event_type, data, customer=None):
+    """
+    Broadcast an event once the current transaction commits. ``customer``
+    limits an event to staff and that customer; events without one are
+    public.
+    """
+    event = {'type': event_type, 'data': data, 'customer': customer, 'at': time.time()}
+    transaction.on_commit(lambda: _send(event))
+
+
+def _order_data(order):
+    return {
+        'id': order.pk,
+        'status': order.status,
+        'total_amount': str(order.total_amount),
+        'due_at': order.due_at.isoformat() if order.due_at else None,
+    }
+
+
+def order_created(order):
+    publish(ORDER_CREATED, _order_data(order), customer=order.customer_id)
+
+
+def order_status_changed(order):
+    publish(ORDER_STATUS, _order_data(order), customer=order.customer_id)
+
+
+def products_sold_out(products):
+    """
+    ``products`` is an iterable of (id, name) pairs
+    """
+    for product_id, name in products:
+        publish(PRODUCT_SOLD_OUT, {'id': product_id, 'name': name})
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps({**event['data'], 'at': event['at']})}\n\n"
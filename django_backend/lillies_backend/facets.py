@@ -0,0 +1,156 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Product
+
+FACETS = ('is_vegetarian', 'is_vegan', 'is_gluten_free', 'is_featured', 'active')
+# Other workers' product changes are only picked up on rebuild, so this
+# bounds how stale facet counts get
+FACET_INDEX_REFRESH = getattr(settings, 'FACET_INDEX_REFRESH', 300)
+
+
+class FacetIndex:
+    """
+    Bitmap index over product facets. Every product owns one bit position;
+    each facet and each category is an int used as a bitset, so any filter
+    combination is a handful of bitwise ANDs and counts are popcounts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset_locked()
+
+    def _reset_locked(self):
+        self._positions = {}
+        self._ids = []
+        self._free = []
+        self._categories = {}
+        self._product_category = {}
+        self._facets = {facet: 0 for facet in FACETS}
+        self._all = 0
+
+    def build(self, rows):
+        with self._lock:
+            self._reset_locked()
+            for row in rows:
+                self._set_locked(row)
+
+    def upsert(self, row):
+        with self._lock:
+            self._clear_locked(row['id'])
+            self._set_locked(row)
+
+    def remove(self, product_id):
+        with self._lock:
+            self._clear_locked(product_id)
+
+    def _set_locked(self, row):
+        if self._free:
+            position = self._free.pop()
+            self._ids[position] = row['id']
+        else:
+            position = len(self._ids)
+            self._ids.append(row['id'])
+        bit = 1 << position
+        self._positions[row['id']] = position
+        self._all |= bit
+        self._product_category[row['id']] = row['category_id']
+        self._categories[row['category_id']] = self._categories.get(row['category_id'], 0) | bit
+        for facet in FACETS:
+            if row[facet]:
+                self._facets[facet] |= bit
+
+    def _clear_locked(self, product_id):
+        position = self._positions.pop(product_id, None)
+        if position is None:
+            return
+        mask = ~(1 << position)
+        self._all &= mask
+        category_id = self._product_category.pop(product_id)
+        self._categories[category_id] &= mask
+        for facet in FACETS:
+            self._facets[facet] &= mask
+        self._ids[position] = None
+        self._free.append(position)
+
+    def select(self, filters, category_id=None):
+        """
+        Return the bitset of products matching every ``facet: bool`` filter
+        and, optionally, a category
+        """
+        with self._lock:
+            bits = self._all
+            if category_id is not None:
+                bits &= self._categories.get(category_id, 0)
+            for facet, wanted in filters.items():
+                bits &= self._facets[facet] if wanted else ~self._facets[facet]
+            return bits & self._all
+
+    def summarize(self, bits):
+        """
+        Count how many of the selected products carry each facet and belong
+        to each category
+        """
+        with self._lock:
+            return {
+                'count': bits.bit_count(),
+                'facets': {facet: (bits & self._facets[facet]).bit_count() for facet in FACETS},
+                'categories': {
+                    category_id: (bits & category_bits).bit_count()
+                    for category_id, category_bits in self._categories.items()
+                    if bits & category_bits
+                },
+            }
+
+    def product_ids(self, bits):
+        # Walk the binary string once instead of peeling bits off a big int
+        with self._lock:
+            flags = bin(bits)[:1:-1]
+            return [self._ids[position] for position, flag in enumerate(flags) if flag == '1']
+
+
+_index = None
+_built_at = 0
+_index_guard = threading.Lock()
+
+
+def _row(product):
+    row = {'id': product.pk, 'category_id': product.category_id}
+    row.update({facet: getattr(product, facet) for facet in FACETS})
+    return row
+
+
+def get_index():
+    """
+    Return the process-wide facet index, building it on first use and again
+    every FACET_INDEX_REFRESH seconds
+    """
+    global _index, _built_at
+    if _index is None or time.monotonic() - _built_at > FACET_INDEX_REFRESH:
+        with _index_guard:
+            if _index is None or time.monotonic() - _built_at > FACET_INDEX_REFRESH:
+                index = FacetIndex()
+                index.build(Product.objects.values('id', 'category_id', *FACETS).iterator())
+                _index, _built_at = index, time.monotonic()
+    return _index
+
+
+def product_changed(product):
+    if _index is not None:
+        _index.upsert(_row(product))
+
+
+def product_removed(product_id):
+    if _index is not None:
+        _index.remove(product_id)
+
+
+def reset():
+    """
+    Drop the index so the next request rebuilds it from the database
+    """
+    global _index
+    with _index_guard:
+        _index = None
@@ -0,0 +1,101 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import permissions
+
+
+def _split(value):
+    if not value:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fieldset(request):
+    """
+    Return the (fields, omit) lists requested via ?fields= and ?omit=, or
+    (None, None) when the request is not a safe read
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None, None
+    params = getattr(request, 'query_params', request.GET)
+    return _split(params.get('fields')), _split(params.get('omit'))
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that trims its fields to ``?fields=`` and drops ``?omit=``
+    on read requests. Explicit ``fields``/``omit`` keyword arguments take
+    precedence over the query string.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+        if fields is None and omit is None:
+            fields, omit = requested_fieldset(self.context.get('request'))
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or []:
+            self.fields.pop(name, None)
+
+
+def sparse_queryset(queryset, serializer, ordering=()):
+    """
+    Restrict ``queryset`` to the columns the serializer will actually read,
+    plus the ``ordering`` columns a cursor paginator reads from each row.
+    Fields backed by properties or methods cannot be mapped to columns, so the
+    queryset is left untouched when any of them is selected, unless the
+    serializer's ``Meta.sparse_dependencies`` lists the columns they read.
+    """
+    model = queryset.model
+    columns = {model._meta.pk.name}
+    columns.update(name.lstrip('-') for name in ordering if '__' not in name)
+    related_columns = {}
+    dependencies = getattr(getattr(serializer, 'Meta', None), 'sparse_dependencies', {})
+    for field in serializer.fields.values():
+        if field.source in dependencies:
+            columns.update(dependencies[field.source])
+            continue
+        if field.source == '*':
+            return queryset
+        parts = field.source.split('.')
+        try:
+            model_field = model._meta.get_field(parts[0])
+        except FieldDoesNotExist:
+            return queryset
+        if model_field.is_relation and (model_field.many_to_many or model_field.one_to_many):
+            # Reverse and many-to-many relations are loaded by prefetching
+            continue
+        columns.add(parts[0])
+        if len(parts) > 1:
+            if not model_field.is_relation:
+                return queryset
+            related_columns.setdefault(parts[0], set()).add('__'.join(parts))
+
+    selected = queryset.query.select_related
+    if isinstance(selected, dict):
+        # Related rows that are no longer serialized must not be joined either
+        queryset = queryset.select_related(None)
+        kept = [name for name in selected if name in related_columns]
+        if kept:
+            queryset = queryset.select_related(*kept)
+        for name in kept:
+            columns.update(related_columns[name])
+    return queryset.only(*columns)
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin that pushes ``?fields=``/``?omit=`` down into the queryset
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, omit = requested_fieldset(self.request)
+        if fields is None and omit is None:
+            return queryset
+        # Cursor pagination reads its ordering columns to build the next cursor
+        paginator = self.paginator
+        ordering = paginator.get_ordering(self.request, queryset, self) if hasattr(paginator, 'get_ordering') else ()
+        return sparse_queryset(queryset, self.get_serializer(), ordering)
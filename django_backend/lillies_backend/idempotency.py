@@ -0,0 +1,108 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+IDEMPOTENCY_TTL = getattr(settings, 'IDEMPOTENCY_TTL', 24 * 60 * 60)
+# How long a key stays claimed while its first request is still running
+IDEMPOTENCY_LOCK_TTL = getattr(settings, 'IDEMPOTENCY_LOCK_TTL', 60)
+
+
+def _store():
+    # Replays only work across app nodes if this alias is a shared cache
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE', 'default')]
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    """
+    Hash what makes two requests "the same": method, path and payload
+    """
+    try:
+        payload = json.dumps(request.data, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        payload = repr(request.data)
+    return _digest(f'{request.method} {request.path} {payload}')[:32]
+
+
+def _find_request(args):
+    for arg in args:
+        if isinstance(arg, (Request, HttpRequest)):
+            return arg
+    raise TypeError('idempotent() views must receive the request')
+
+
+def idempotent(scope):
+    """
+    Honour an ``Idempotency-Key`` header on a DRF view or viewset method.
+
+    The first response for a key (per user and ``scope``) is stored for
+    IDEMPOTENCY_TTL seconds as a compact (fingerprint, status, data) tuple and
+    replayed for retries, so a retried order POST neither creates a second
+    order nor sends a second email. Reusing a key with a different payload is
+    rejected, as is a retry that arrives while the first request is running.
+    Server errors are not stored, so they can be retried. Requests without
+    the header are unaffected.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = _find_request(args)
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"detail": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            user = getattr(request, 'user', None)
+            owner = user.pk if user is not None and user.is_authenticated else 'anon'
+            cache_key = f'idem:{scope}:{owner}:{_digest(key)}'
+            lock_key = f'{cache_key}:lock'
+            fingerprint = _fingerprint(request)
+            store = _store()
+
+            stored = store.get(cache_key)
+            if stored is None:
+                if not store.add(lock_key, fingerprint, IDEMPOTENCY_LOCK_TTL):
+                    return Response(
+                        {"detail": "A request with this Idempotency-Key is still being processed"},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                # The first request may have finished between get() and add()
+                stored = store.get(cache_key)
+                if stored is None:
+                    try:
+                        response = view(*args, **kwargs)
+                        if response.status_code < 500 and hasattr(response, 'data'):
+                            store.set(cache_key, (fingerprint, response.status_code, response.data), IDEMPOTENCY_TTL)
+                        return response
+                    finally:
+                        store.delete(lock_key)
+                store.delete(lock_key)
+
+            stored_fingerprint, status_code, data = stored
+            if stored_fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            response = Response(data, status=status_code)
+            response[REPLAYED_HEADER] = 'true'
+            return response
+        return wrapper
+    return decorator
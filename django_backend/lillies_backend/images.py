@@ -0,0 +1,114 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import menu_cache
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> maximum width in pixels
+VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'hero': 1200,
+}
+
+# Output format -> (Pillow format, save options, file extension)
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}, 'webp'),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}, 'jpg'),
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-variants')
+
+
+def variant_name(field, variant, extension):
+    # Resolve through upload_to so variants land in the same directory as
+    # originals, whatever name the storage then gives them
+    stem, _ = os.path.splitext(os.path.basename(field.name))
+    return field.field.generate_filename(field.instance, f'{stem}_{variant}.{extension}')
+
+
+def _encode(image, pillow_format, options):
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel, so flatten transparent PNGs onto white
+        from PIL import Image
+
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def build_variants(field):
+    """
+    Write every size/format variant of an ImageField file next to it and
+    return the {variant: {'width', format: name}} map. The storage names the
+    files by content hash, so identical variants are only stored once.
+    """
+    from PIL import Image, ImageOps
+
+    storage = field.storage
+    with field.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    variants = {}
+    for variant, max_width in VARIANTS.items():
+        resized = original.copy()
+        if resized.width > max_width:
+            resized.thumbnail((max_width, max_width * 10), Image.LANCZOS)
+        entry = {'width': resized.width}
+        for format_name, (pillow_format, options, extension) in FORMATS.items():
+            name = variant_name(field, variant, extension)
+            entry[format_name] = storage.save(name, ContentFile(_encode(resized, pillow_format, options)))
+        variants[variant] = entry
+    return variants
+
+
+def generate_variants(product_id):
+    """
+    Build variants for a product's current image and store the map, unless the
+    image was replaced while we were working
+    """
+    product = Product.objects.filter(pk=product_id).only('id', 'image').first()
+    if product is None or not product.image:
+        return None
+    variants = build_variants(product.image)
+    updated = Product.objects.filter(pk=product_id, image=product.image.name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        # A set-based write sends no save signal
+        transaction.on_commit(menu_cache.bump_menu_version)
+    return variants
+
+
+def _run(product_id):
+    try:
+        generate_variants(product_id)
+    except Exception:
+        logger.exception('Failed to generate image variants for product %s', product_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(product_id):
+    """
+    Generate variants once the current transaction commits, on a background
+    thread unless IMAGE_PROCESSING_ASYNC is disabled
+    """
+    if getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_run, product_id))
+    else:
+        transaction.on_commit(lambda: _run(product_id))
@@ -0,0 +1,243 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .models import OPEN_ORDER_STATUSES, Category, Order, OrderItem
+
+KITCHEN_STATIONS = getattr(settings, 'KITCHEN_STATIONS', {'kitchen': 2})
+KITCHEN_CATEGORY_STATIONS = getattr(settings, 'KITCHEN_CATEGORY_STATIONS', {})
+# Other workers' orders are only picked up on reload, so this bounds drift
+KITCHEN_SCHEDULE_REFRESH = getattr(settings, 'KITCHEN_SCHEDULE_REFRESH', 60)
+# Open orders past this many in due order get no ETA
+KITCHEN_SCHEDULE_MAX_ORDERS = getattr(settings, 'KITCHEN_SCHEDULE_MAX_ORDERS', 1000)
+
+
+class Ticket:
+    """
+    One open order as the kitchen sees it: when it is due and how many
+    minutes of work it needs at each station
+    """
+    __slots__ = ('order_id', 'due_at', 'work', 'started_at')
+
+    def __init__(self, order_id, due_at, work, started_at=None):
+        self.order_id = order_id
+        self.due_at = due_at
+        self.work = work
+        self.started_at = started_at
+
+    @property
+    def sort_key(self):
+        # Orders already cooking hold their slots ahead of everything queued
+        return (self.started_at is None, self.due_at, self.order_id)
+
+
+class KitchenSchedule:
+    """
+    In-memory schedule of the open orders. Each station cooks up to its
+    configured number of orders at once; an order needs, at every station
+    it uses, the preparation minutes of its items there times their
+    quantities, and is ready when its last station finishes. Orders that do not start cooking before they are
+    due are started just in time for their due time.
+
+    New orders at the back of the queue are placed against the stations'
+    current free times without touching the rest of the schedule. Removing
+    or starting an order replays the open queue in memory.
+    """
+
+    def __init__(self, stations, category_names=None):
+        self.stations = {station: max(count, 1) for station, count in stations.items()}
+        # Category id -> name, for routing items to stations
+        self.category_names = category_names or {}
+        self._tickets = {}
+        self._etas = {}
+        self._free = {}
+        self._last_key = None
+        self._lock = threading.Lock()
+
+    def _place(self, ticket, free, now):
+        ready = max(now, ticket.due_at)
+        for station, minutes in ticket.work.items():
+            seconds = minutes * 60
+            slot_free = heapq.heappop(free[station])
+            if ticket.started_at is not None:
+                start = now
+                seconds = max(seconds - (now - ticket.started_at), 0)
+            else:
+                start = max(slot_free, now, ticket.due_at - seconds)
+            finish = start + seconds
+            heapq.heappush(free[station], finish)
+            ready = max(ready, finish)
+        return ready
+
+    def _replay_locked(self, now):
+        free = {station: [now] * count for station, count in self.stations.items()}
+        etas = {}
+        last_key = None
+        for ticket in sorted(self._tickets.values(), key=lambda ticket: ticket.sort_key):
+            etas[ticket.order_id] = self._place(ticket, free, now)
+            last_key = ticket.sort_key
+        self._etas, self._free, self._last_key = etas, free, last_key
+
+    def load(self, tickets, now=None):
+        with self._lock:
+            self._tickets = {ticket.order_id: ticket for ticket in tickets}
+            self._replay_locked(now or time.time())
+
+    def add(self, ticket, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._tickets[ticket.order_id] = ticket
+            if self._last_key is None or ticket.sort_key >= self._last_key:
+                self._etas[ticket.order_id] = self._place(ticket, self._free, now)
+                self._last_key = ticket.sort_key
+            else:
+                self._replay_locked(now)
+
+    def start(self, order_id, now=None):
+        now = now or time.time()
+        with self._lock:
+            ticket = self._tickets.get(order_id)
+            if ticket is not None and ticket.started_at is None:
+                ticket.started_at = now
+                self._replay_locked(now)
+
+    def remove(self, order_id, now=None):
+        with self._lock:
+            if self._tickets.pop(order_id, None) is not None:
+                self._replay_locked(now or time.time())
+
+    def eta(self, order_id):
+        return self._etas.get(order_id)
+
+    def ready_at(self, work, now=None):
+        """
+        When an order needing ``work`` could be ready if it were queued now,
+        without adding it. With no work, when the first cook comes free.
+        """
+        now = now or time.time()
+        with self._lock:
+            free = {station: list(heap) for station, heap in self._free.items()}
+        if not work:
+            return max(now, min(heap[0] for heap in free.values()))
+        return self._place(Ticket(None, now, work), free, now)
+
+
+def station_for(category_id, category_names):
+    station = KITCHEN_CATEGORY_STATIONS.get(category_names.get(category_id))
+    return station if station in KITCHEN_STATIONS else next(iter(KITCHEN_STATIONS))
+
+
+def order_work(lines, category_names):
+    """
+    Minutes of work per station for ``lines`` of (category_id,
+    preparation_time, quantity), counted per unit as slots.order_minutes
+    books them
+    """
+    work = {}
+    for category_id, preparation_time, quantity in lines:
+        station = station_for(category_id, category_names)
+        work[station] = work.get(station, 0) + (preparation_time or 0) * quantity
+    return work
+
+
+def _category_names():
+    if not KITCHEN_CATEGORY_STATIONS:
+        return {}
+    return dict(Category.objects.values_list('id', 'name'))
+
+
+def _load_tickets(category_names):
+    orders = list(
+        Order.objects.filter(status__in=OPEN_ORDER_STATUSES)
+        .order_by('due_at', 'id')
+        .values_list('id', 'status', 'due_at', 'created_at', 'updated_at')[:KITCHEN_SCHEDULE_MAX_ORDERS]
+    )
+    lines = {}
+    items = OrderItem.objects.filter(order_id__in=[order[0] for order in orders]).values_list(
+        'order_id', 'product__category_id', 'product__preparation_time', 'quantity'
+    )
+    for order_id, category_id, preparation_time, quantity in items:
+        lines.setdefault(order_id, []).append((category_id, preparation_time, quantity))
+
+    return [
+        Ticket(
+            order_id,
+            (due_at or created_at).timestamp(),
+            order_work(lines.get(order_id, []), category_names),
+            # Processing orders are taken to have started at their last update
+            updated_at.timestamp() if status == 'processing' else None,
+        )
+        for order_id, status, due_at, created_at, updated_at in orders
+    ]
+
+
+_schedule = None
+_loaded_at = 0
+_schedule_guard = threading.Lock()
+
+
+def get_schedule():
+    """
+    Return the process-wide schedule, loading the open orders on first use
+    and again every KITCHEN_SCHEDULE_REFRESH seconds
+    """
+    global _schedule, _loaded_at
+    if _schedule is None or time.monotonic() - _loaded_at > KITCHEN_SCHEDULE_REFRESH:
+        with _schedule_guard:
+            if _schedule is None or time.monotonic() - _loaded_at > KITCHEN_SCHEDULE_REFRESH:
+                schedule = KitchenSchedule(KITCHEN_STATIONS, _category_names())
+                schedule.load(_load_tickets(schedule.category_names))
+                _schedule, _loaded_at = schedule, time.monotonic()
+    return _schedule
+
+
+def order_placed(order, lines):
+    """
+    Queue a new order; ``lines`` are (category_id, preparation_time,
+    quantity) for its items. Call once the order is committed.
+    """
+    if _schedule is None:
+        return
+    work = order_work(lines, _schedule.category_names)
+    _schedule.add(Ticket(order.pk, (order.due_at or order.created_at).timestamp(), work))
+
+
+def order_status_changed(order):
+    if _schedule is None:
+        return
+    if order.status == 'processing':
+        _schedule.start(order.pk)
+    elif order.status not in OPEN_ORDER_STATUSES:
+        _schedule.remove(order.pk)
+
+
+def ready_at(lines=(), now=None):
+    """
+    Earliest time an order of ``lines`` (category_id, preparation_time,
+    quantity) could be ready behind the open orders, as an aware datetime
+    """
+    schedule = get_schedule()
+    ready = schedule.ready_at(order_work(lines, schedule.category_names), now)
+    return datetime.fromtimestamp(ready, tz=dt_timezone.utc)
+
+
+def eta(order):
+    """
+    When an open order should be ready, or None once it left the kitchen
+    """
+    if order.status not in OPEN_ORDER_STATUSES:
+        return None
+    ready = get_schedule().eta(order.pk)
+    return datetime.fromtimestamp(int(ready), tz=dt_timezone.utc) if ready is not None else None
+
+
+def reset():
+    """
+    Drop the schedule; it reloads from the open orders on next use
+    """
+    global _schedule
+    with _schedule_guard:
+        _schedule = None
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lillies_backend.allergens import sync_products
+from lillies_backend.models import Product
+
+class Command(BaseCommand):
+    help = 'Parse Product.allergens text into normalized allergen rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        total = 0
+        for product in Product.objects.only('id', 'allergens').iterator(chunk_size=batch_size):
+            batch.append(product)
+            if len(batch) >= batch_size:
+                total += self.sync(batch)
+                batch = []
+        if batch:
+            total += self.sync(batch)
+        self.stdout.write(self.style.SUCCESS(f'Backfilled allergens for {total} products'))
+
+    def sync(self, batch):
+        with transaction.atomic():
+            sync_products(batch)
+        return len(batch)
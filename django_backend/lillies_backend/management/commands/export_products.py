@@ -0,0 +1,21 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from lillies_backend import bulk
+
+class Command(BaseCommand):
+    help = 'Export all products as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--output', help='File to write to (defaults to stdout)')
+
+    def handle(self, *args, **options):
+        rows = bulk.export_rows()
+        chunks = bulk.stream_csv(rows) if options['type'] == 'csv' else bulk.stream_jsonl(rows)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from lillies_backend.images import generate_variants
+from lillies_backend.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG variants for product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate variants for every product, not only those missing them',
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            products = products.filter(image_variants={})
+
+        generated = 0
+        for product_id in products.values_list('id', flat=True).iterator():
+            try:
+                if generate_variants(product_id):
+                    generated += 1
+            except Exception as exc:
+                self.stderr.write(f'Product {product_id}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {generated} products'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lillies_backend import bulk
+
+class Command(BaseCommand):
+    help = 'Upsert products by sku from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--type', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=bulk.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_type = options['type'] or path.rsplit('.', 1)[-1].lower()
+        if file_type not in ('csv', 'jsonl'):
+            raise CommandError('Pass --type csv or --type jsonl')
+
+        with open(path, 'rb') as stream:
+            result = bulk.import_products(bulk.read_rows(stream, file_type), batch_size=options['batch_size'])
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']} ({error['sku']}): {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {result['processed']} rows, imported {result['imported']}, "
+            f"{result['error_count']} errors"
+        ))
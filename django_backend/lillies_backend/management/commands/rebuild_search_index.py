@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from lillies_backend import search
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index'
+
+    def handle(self, *args, **options):
+        if not search.create_index():
+            self.stdout.write(self.style.WARNING('Full-text search is not supported by this database'))
+            return
+        search.index_products()
+        self.stdout.write(self.style.SUCCESS('Product search index rebuilt'))
@@ -0,0 +1,74 @@
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from lillies_backend.models import Product
+
+class Command(BaseCommand):
+    help = 'Delete product media files that no product references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep unreferenced files younger than this; uploads are stored before their row commits',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def reference_counts(self):
+        counts = Counter()
+        rows = Product.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'image_variants')
+        for product in rows.iterator(chunk_size=2000):
+            counts[product.image.name] += 1
+            counts.update(product.variant_files())
+        return counts
+
+    def walk(self, storage, path):
+        try:
+            directories, files = storage.listdir(path)
+        except FileNotFoundError:
+            return
+        for name in files:
+            yield posixpath.join(path, name)
+        for directory in directories:
+            yield from self.walk(storage, posixpath.join(path, directory))
+
+    def handle(self, *args, **options):
+        field = Product._meta.get_field('image')
+        storage = field.storage
+        counts = self.reference_counts()
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        batch = []
+        deleted = 0
+        for name in self.walk(storage, field.upload_to.rstrip('/')):
+            if counts[name] or storage.get_modified_time(name) > cutoff:
+                continue
+            batch.append(name)
+            if len(batch) >= options['batch_size']:
+                deleted += self.sweep(storage, batch, cutoff, options['dry_run'])
+                batch = []
+        if batch:
+            deleted += self.sweep(storage, batch, cutoff, options['dry_run'])
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} unreferenced files ({len(counts)} referenced)'
+        ))
+
+    def sweep(self, storage, batch, cutoff, dry_run):
+        # The walk can take a while: drop files that were pointed at or
+        # touched by a deduplicated save since their reference was counted
+        referenced = set(Product.objects.filter(image__in=batch).values_list('image', flat=True))
+        batch = [name for name in batch if name not in referenced and storage.get_modified_time(name) <= cutoff]
+        for name in batch:
+            if dry_run:
+                self.stdout.write(name)
+            else:
+                storage.delete(name)
+        return len(batch)
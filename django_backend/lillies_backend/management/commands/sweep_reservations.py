@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from lillies_backend.reservations import SWEEP_BATCH_SIZE, sweep_expired
+
+class Command(BaseCommand):
+    help = 'Release expired stock holds in batches (scheduled every few minutes in render.yaml)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        removed = sweep_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {removed} expired stock holds'))
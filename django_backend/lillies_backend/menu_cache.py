@@ -0,0 +1,68 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+MENU_VERSION_KEY = 'menu:version'
+MENU_CACHE_TIMEOUT = getattr(settings, 'MENU_CACHE_TIMEOUT', 60 * 60)
+
+# One lock per cache key so concurrent misses on the same payload wait for
+# a single rebuild instead of all hitting the database at once.
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+
+def _lock_for(key):
+    with _build_locks_guard:
+        lock = _build_locks.get(key)
+        if lock is None:
+            lock = _build_locks[key] = threading.Lock()
+        return lock
+
+
+def get_menu_version():
+    """
+    Return the current catalog version, one cache read per request. It
+    lives in the default cache, so it is shared by every process that
+    shares CACHE_URL. A lost or evicted version reads as a new one, which
+    only costs a rebuild; versions are timestamps, so they never repeat.
+    """
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        cache.add(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(MENU_VERSION_KEY)
+    return version
+
+
+def bump_menu_version():
+    """
+    Invalidate every cached menu payload by moving to a new version
+    """
+    cache.set(MENU_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def menu_cache_key(*parts):
+    return ':'.join(['menu', str(get_menu_version())] + [str(part) for part in parts])
+
+
+def get_or_build(parts, builder):
+    """
+    Return the cached payload for ``parts`` under the current menu version,
+    calling ``builder`` at most once per process on a miss
+    """
+    key = menu_cache_key(*parts)
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    with _lock_for(key):
+        # Another request may have rebuilt the payload while we waited
+        payload = cache.get(key)
+        if payload is None:
+            payload = builder()
+            cache.set(key, payload, timeout=MENU_CACHE_TIMEOUT)
+
+    with _build_locks_guard:
+        _build_locks.pop(key, None)
+    return payload
@@ -25,7 +25,7 @@ class CORSMiddleware:
                 response = HttpResponse()
                 response["Access-Control-Allow-Origin"] = origin
                 response["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-                response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-Requested-With"
+                response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-Requested-With, Idempotency-Key, X-Cart-Token"
                 response["Access-Control-Allow-Credentials"] = "true"
                 response["Access-Control-Max-Age"] = "3600"
                 return response
@@ -51,7 +51,7 @@ class CORSMiddleware:
                 response["Access-Control-Allow-Origin"] = origin
                 response["Access-Control-Allow-Credentials"] = "true"
                 response["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-                response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-Requested-With"
+                response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-Requested-With, Idempotency-Key, X-Cart-Token"
                 response["Access-Control-Max-Age"] = "3600"  # Cache preflight for 1 hour
             return response
         
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from lillies_backend import search
+
+    if search.create_index(schema_editor.connection):
+        search.index_products(connection=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from lillies_backend import search
+
+    search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lillies_backend', '0005_product_category_related_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
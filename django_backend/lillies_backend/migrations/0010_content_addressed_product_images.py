@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:01
+
+import lillies_backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lillies_backend', '0009_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=lillies_backend.storage.product_image_storage, upload_to='products/'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_due_at(apps, schema_editor):
+    Order = apps.get_model('lillies_backend', 'Order')
+    Order.objects.filter(due_at__isnull=True).update(due_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lillies_backend', '0012_order_customer_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_due_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ('pending', 'processing'))), fields=['due_at', 'id'], name='order_open_due_idx'),
+        ),
+    ]
@@ -1,32 +1,77 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth import get_user_model
-import os
+from django.utils import timezone
+
+from .storage import product_image_storage
+from .tracking import TrackedFieldsMixin
 
 User = get_user_model()
 
+class CategoryQuerySet(models.QuerySet):
+    def with_product_counts(self):
+        """
+        Annotate product_count and active_product_count in the same query
+        """
+        return self.annotate(
+            product_count=models.Count('products', distinct=True),
+            active_product_count=models.Count(
+                'products', filter=models.Q(products__active=True), distinct=True
+            ),
+        )
+
+    def with_active_products(self):
+        """
+        Prefetch active products into ``active_products`` with a single query
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                'products',
+                queryset=Product.objects.filter(active=True).select_related('category'),
+                to_attr='active_products',
+            )
+        )
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
-class Product(models.Model):
+class Allergen(models.Model):
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class Product(TrackedFieldsMixin, models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    category = models.ForeignKey('Category', on_delete=models.CASCADE)
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, related_name='products')
     active = models.BooleanField(default=True)
-    image = models.ImageField(upload_to='products/', null=True, blank=True)
+    # Stored under content-hash names; shared files are cleaned up by sweep_media
+    image = models.ImageField(upload_to='products/', storage=product_image_storage, null=True, blank=True)
+    # Resized copies of ``image`` written by lillies_backend.images:
+    # {variant: {'width': px, 'webp': name, 'jpeg': name}}
+    image_variants = models.JSONField(default=dict, blank=True)
     stock = models.IntegerField(default=0)
+    # Units held by live StockReservations, maintained with F() updates by
+    # lillies_backend.reservations so availability never needs a join
+    reserved = models.PositiveIntegerField(default=0)
     sku = models.CharField(max_length=100, unique=True, null=True, blank=True)
     preparation_time = models.IntegerField(help_text='Preparation time in minutes', default=30)
     calories = models.IntegerField(null=True, blank=True)
     ingredients = models.TextField(null=True, blank=True)
     allergens = models.TextField(null=True, blank=True)
+    # Normalized form of ``allergens``, kept in sync by lillies_backend.allergens
+    allergen_tags = models.ManyToManyField('Allergen', blank=True, related_name='products')
     is_vegetarian = models.BooleanField(default=False)
     is_vegan = models.BooleanField(default=False)
     is_gluten_free = models.BooleanField(default=False)
@@ -35,40 +80,52 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
-    def delete_image_if_exists(self):
-        if self.image:
-            if os.path.isfile(self.image.path):
-                os.remove(self.image.path)
-            self.image = None
-
-    def delete(self, *args, **kwargs):
-        self.delete_image_if_exists()
-        super().delete(*args, **kwargs)
+    def variant_files(self):
+        return [
+            name
+            for entry in (self.image_variants or {}).values()
+            for key, name in entry.items()
+            if key != 'width'
+        ]
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            try:
-                old_instance = Product.objects.get(pk=self.pk)
-                if old_instance.image and self.image and old_instance.image != self.image:
-                    old_instance.delete_image_if_exists()
-            except Product.DoesNotExist:
-                pass
+        update_fields = kwargs.get('update_fields')
+        image_changed = 'image' in self.changed_fields and (update_fields is None or 'image' in update_fields)
+        if image_changed:
+            self.image_variants = {}
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'image_variants'}
         super().save(*args, **kwargs)
+        if image_changed and self.image:
+            from .images import schedule_variants
+            schedule_variants(self.pk)
 
     @property
     def is_in_stock(self):
         return self.stock > 0 if self.stock is not None else False
         
+    @property
+    def available_stock(self):
+        return max((self.stock or 0) - self.reserved, 0)
+
     @property
     def final_price(self):
         if self.discount_price is not None:
             return self.discount_price
         return self.price
 
-class Order(models.Model):
+# Orders the kitchen still has to work on
+OPEN_ORDER_STATUSES = ('pending', 'processing')
+
+class Order(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('processing', 'Processing'),
@@ -76,6 +133,14 @@ class Order(models.Model):
         ('delivered', 'Delivered'),
         ('cancelled', 'Cancelled'),
     ]
+    # Allowed status changes; anything else is rejected by orders.transition()
+    TRANSITIONS = {
+        'pending': {'processing', 'cancelled'},
+        'processing': {'shipped', 'delivered', 'cancelled'},
+        'shipped': {'delivered'},
+        'delivered': set(),
+        'cancelled': set(),
+    }
     
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     customer_name = models.CharField(max_length=255, blank=True)
@@ -87,6 +152,25 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # When the order should be ready; defaults to the time it was placed
+    due_at = models.DateTimeField(null=True, blank=True)
+    # Pickup slot booked at checkout and the preparation minutes it holds there
+    pickup_slot = models.ForeignKey('PickupSlot', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
+    slot_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            # Per-customer order history, newest first
+            models.Index(fields=['customer', '-created_at', '-id'], name='order_customer_created_idx'),
+            # Kitchen queue: only open orders are indexed, so delivered
+            # history never grows it
+            models.Index(
+                fields=['due_at', 'id'],
+                name='order_open_due_idx',
+                condition=models.Q(status__in=OPEN_ORDER_STATUSES),
+            ),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} by {self.customer.email}"
@@ -97,8 +181,18 @@ class Order(models.Model):
             self.customer_name = self.customer.get_full_name() or self.customer.email
         if not self.customer_email and self.customer:
             self.customer_email = self.customer.email
+        if self._state.adding and self.due_at is None:
+            self.due_at = timezone.now()
         super().save(*args, **kwargs)
 
+    def can_transition(self, status):
+        return status in self.TRANSITIONS.get(self.status, ())
+
+    @property
+    def eta(self):
+        from .kitchen import eta
+        return eta(self)
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -107,3 +201,43 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+class StockReservation(models.Model):
+    """
+    A time-limited hold on product stock for one cart. ``holder`` identifies
+    the cart (``user:<id>`` or an anonymous cart token).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    holder = models.CharField(max_length=64)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['holder', 'product'], name='reservation_holder_product_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held by {self.holder}"
+
+class PickupSlot(models.Model):
+    """
+    A pickup window starting at ``starts_at``. ``booked_minutes`` sums the
+    preparation minutes of the orders booked into it and only changes
+    through conditional UPDATEs, so a full slot is refused without counting
+    orders.
+    """
+    starts_at = models.DateTimeField(unique=True)
+    capacity_minutes = models.PositiveIntegerField()
+    booked_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['starts_at']
+
+    def __str__(self):
+        return f"Pickup {self.starts_at:%Y-%m-%d %H:%M} ({self.booked_minutes}/{self.capacity_minutes} min)"
+
+    @property
+    def remaining_minutes(self):
+        return max(self.capacity_minutes - self.booked_minutes, 0)
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import availability, events, kitchen, slots
+from .models import OPEN_ORDER_STATUSES, Order, OrderItem, Product
+
+KITCHEN_QUEUE_LIMIT = 200
+
+
+class TransitionError(Exception):
+    """
+    Raised when an order cannot move to the requested status. ``status`` is
+    the HTTP status the API should answer with.
+    """
+
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def transition(order, to_status):
+    """
+    Move ``order`` to ``to_status`` with a conditional UPDATE that only
+    matches while the row still has the status the caller saw, so two staff
+    screens racing on the same order cannot both win. Updates ``order`` in
+    place on success.
+    """
+    if to_status == order.status:
+        return order
+    if not order.can_transition(to_status):
+        raise TransitionError(f"A {order.status} order cannot become {to_status}", status=400)
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order.pk, status=order.status).update(status=to_status, updated_at=now)
+        if not updated:
+            current = Order.objects.filter(pk=order.pk).values_list('status', flat=True).first()
+            raise TransitionError(f"The order is already {current or 'deleted'}")
+        if to_status == 'cancelled':
+            # Cancelled orders give their pickup slot capacity and stock back
+            slots.release(order)
+            restock(order)
+
+    order.status = to_status
+    order.updated_at = now
+    order._snapshot_fields({'status', 'updated_at'})
+    transaction.on_commit(lambda: kitchen.order_status_changed(order))
+    events.order_status_changed(order)
+    return order
+
+
+def restock(order):
+    """
+    Add the quantities of ``order``'s items back to stock. Call only after
+    the conditional status UPDATE matched, so each order restocks once.
+    """
+    quantities = (
+        OrderItem.objects.filter(order_id=order.pk)
+        .values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+    )
+    for product_id, quantity in quantities:
+        Product.objects.filter(pk=product_id).update(stock=F('stock') + quantity)
+    transaction.on_commit(availability.invalidate)
+
+
+def kitchen_queue():
+    """
+    Open orders, earliest due first, in the order of the partial
+    ``order_open_due_idx`` index. Slice it to at most KITCHEN_QUEUE_LIMIT.
+    """
+    return Order.objects.filter(status__in=OPEN_ORDER_STATUSES).order_by('due_at', 'id')
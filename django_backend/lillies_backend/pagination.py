@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first. Cursors are opaque
+    and every page costs the same index range scan however deep it is.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class IdCursorPagination(CreatedAtCursorPagination):
+    """
+    Keyset pagination for tables without a created_at column
+    """
+    ordering = ('-id',)
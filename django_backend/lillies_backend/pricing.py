@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value, DecimalField
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from .models import Product
+from .signals import products_bulk_changed
+
+
+def _discount_expression(rule):
+    if rule['type'] == 'clear':
+        return None
+    if rule['type'] == 'percentage':
+        factor = (Decimal(100) - rule['value']) / Decimal(100)
+        return Round(F('price') * Value(factor), 2, output_field=DecimalField(max_digits=10, decimal_places=2))
+    return Greatest(
+        F('price') - Value(rule['value']),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def _money(value):
+    # Match the string formatting DRF uses for DecimalFields
+    return None if value is None else str(value)
+
+
+def _scope(rule):
+    queryset = Product.objects.all()
+    if 'category' in rule:
+        queryset = queryset.filter(category=rule['category'])
+    if 'skus' in rule:
+        queryset = queryset.filter(sku__in=rule['skus'])
+    return queryset
+
+
+def apply_pricing_rules(rules, dry_run=False):
+    """
+    Apply the rules in order as set-based UPDATEs inside one transaction and
+    return the per-product discount diff. Later rules win where they overlap.
+    With ``dry_run`` the transaction is rolled back after computing the diff.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        before = {}
+        for rule in rules:
+            scoped = _scope(rule).select_for_update()
+            for pk, discount_price in scoped.values_list('id', 'discount_price'):
+                before.setdefault(pk, discount_price)
+            _scope(rule).update(discount_price=_discount_expression(rule), updated_at=now)
+
+        diff = []
+        for pk, sku, name, price, discount_price in (
+            Product.objects.filter(pk__in=before).order_by('id')
+            .values_list('id', 'sku', 'name', 'price', 'discount_price')
+        ):
+            if discount_price != before[pk]:
+                diff.append({
+                    'id': pk,
+                    'sku': sku,
+                    'name': name,
+                    'price': _money(price),
+                    'old_discount_price': _money(before[pk]),
+                    'new_discount_price': _money(discount_price),
+                })
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if diff and not dry_run:
+        products_bulk_changed.send(sender=Product, product_ids=[change['id'] for change in diff])
+    return diff
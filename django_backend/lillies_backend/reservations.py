@@ -0,0 +1,180 @@
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from . import availability
+from .models import Product, StockReservation
+
+STOCK_HOLD_TTL = getattr(settings, 'STOCK_HOLD_TTL', 15 * 60)
+SWEEP_BATCH_SIZE = 500
+CART_TOKEN_HEADER = 'X-Cart-Token'
+_CART_TOKEN = re.compile(r'^[A-Za-z0-9_-]{16,48}$')
+
+
+class ReservationError(Exception):
+    def __init__(self, message, product_ids=()):
+        super().__init__(message)
+        self.message = message
+        self.product_ids = sorted(product_ids)
+
+
+def holder_for(request):
+    """
+    Identify the cart behind a request: the signed-in user, otherwise the
+    anonymous ``X-Cart-Token`` header. Returns None when neither is usable.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user_holder(user)
+    return token_holder(request)
+
+
+def token_holder(request):
+    token = request.headers.get(CART_TOKEN_HEADER, '')
+    return f'cart:{token}' if _CART_TOKEN.match(token) else None
+
+
+def user_holder(user):
+    return f'user:{user.pk}'
+
+
+def _adjust_reserved(deltas):
+    """
+    Apply ``{product_id: delta}`` to Product.reserved in one UPDATE. Stock
+    levels reach the menu through the availability overlay, so updated_at and
+    the cached menu payloads are left alone.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    Product.objects.filter(pk__in=deltas).update(
+        reserved=F('reserved') + Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    )
+    transaction.on_commit(availability.invalidate)
+
+
+def release_expired(product_ids, now=None):
+    """
+    Give back the units of expired holds on ``product_ids``. Called inside
+    the transaction that is about to reserve or sell them, so abandoned
+    carts never block stock even when sweep_reservations has not run yet.
+    Rows another transaction has locked are left to it or the next sweep.
+    """
+    now = now or timezone.now()
+    ids = list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(product_id__in=product_ids, expires_at__lte=now)
+        .values_list('id', flat=True)
+    )
+    if not ids:
+        return {}
+    expired = StockReservation.objects.filter(pk__in=ids)
+    totals = dict(expired.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+    expired.delete()
+    _adjust_reserved({pk: -total for pk, total in totals.items()})
+    return totals
+
+
+def hold(holder, product_id, quantity, ttl=None):
+    """
+    Set the holder's hold on a product to ``quantity`` units and restart its
+    TTL. Growing a hold only succeeds while the extra units are available,
+    checked in the same conditional UPDATE that reserves them.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl or STOCK_HOLD_TTL)
+    with transaction.atomic():
+        release_expired([product_id], now)
+        existing = (
+            StockReservation.objects.select_for_update()
+            .filter(holder=holder, product_id=product_id).first()
+        )
+        delta = quantity - (existing.quantity if existing else 0)
+        if delta > 0:
+            reserved = Product.objects.filter(
+                pk=product_id, active=True, stock__gte=F('reserved') + delta
+            ).update(reserved=F('reserved') + delta)
+            if not reserved:
+                raise ReservationError('Not enough stock', [product_id])
+            transaction.on_commit(availability.invalidate)
+        elif delta < 0:
+            _adjust_reserved({product_id: delta})
+
+        if quantity == 0:
+            if existing:
+                existing.delete()
+            reservation = None
+        elif existing:
+            existing.quantity = quantity
+            existing.expires_at = expires_at
+            existing.save(update_fields=['quantity', 'expires_at'])
+            reservation = existing
+        else:
+            reservation = StockReservation.objects.create(
+                holder=holder, product_id=product_id, quantity=quantity, expires_at=expires_at
+            )
+    return reservation
+
+
+def release(holder, product_ids=None):
+    """
+    Drop the holder's holds (all of them, or only for ``product_ids``)
+    """
+    with transaction.atomic():
+        holds = StockReservation.objects.select_for_update().filter(holder=holder)
+        if product_ids is not None:
+            holds = holds.filter(product_id__in=product_ids)
+        released = dict(holds.values_list('product_id', 'quantity'))
+        if released:
+            holds.filter(product_id__in=released).delete()
+            _adjust_reserved({pk: -quantity for pk, quantity in released.items()})
+    return released
+
+
+def sweep_expired(batch_size=SWEEP_BATCH_SIZE, now=None):
+    """
+    Delete expired holds a batch at a time and give their units back. Each
+    batch is one short transaction, so sweeping never blocks checkouts for
+    long. Returns the number of holds removed.
+    """
+    now = now or timezone.now()
+    removed = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            expired = StockReservation.objects.filter(pk__in=ids, expires_at__lte=now)
+            totals = dict(expired.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+            count, _ = expired.delete()
+            _adjust_reserved({pk: -total for pk, total in totals.items()})
+        removed += count
+        if len(ids) < batch_size:
+            break
+    return removed
+
+
+def convert_holds(holder, product_ids):
+    """
+    Remove the holder's holds on ``product_ids`` and return ``{product_id:
+    quantity}``. Must run inside the checkout transaction, which subtracts the
+    returned quantities from Product.reserved along with the stock decrement.
+    """
+    holds = StockReservation.objects.select_for_update().filter(holder=holder, product_id__in=product_ids)
+    held = dict(holds.values_list('product_id', 'quantity'))
+    if held:
+        holds.delete()
+    return held
@@ -0,0 +1,201 @@
+import re
+
+from django.conf import settings
+from django.db import connection as default_connection, models
+from django.db.utils import DatabaseError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Category, Product
+
+# SQLite uses an FTS5 virtual table keyed by product rowid; Postgres uses a plain
+# table holding a weighted tsvector per product behind a GIN index.
+SQLITE_INDEX_TABLE = 'lillies_backend_product_fts'
+POSTGRES_INDEX_TABLE = 'lillies_backend_product_search'
+
+SEARCH_RESULT_LIMIT = getattr(settings, 'PRODUCT_SEARCH_LIMIT', 500)
+INDEX_BATCH_SIZE = 500
+
+_available = {}
+
+
+def _index_table(connection):
+    if connection.vendor == 'sqlite':
+        return SQLITE_INDEX_TABLE
+    if connection.vendor == 'postgresql':
+        return POSTGRES_INDEX_TABLE
+    return None
+
+
+def create_index(connection=default_connection):
+    """
+    Create the full-text index table for the current database, if supported
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_INDEX_TABLE} USING fts5("
+                    "name, description, sku, category, "
+                    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            except DatabaseError:
+                # SQLite built without FTS5; search falls back to LIKE filtering
+                return False
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {POSTGRES_INDEX_TABLE} ("
+                f"product_id bigint PRIMARY KEY REFERENCES {Product._meta.db_table} (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX_TABLE}_document_gin "
+                f"ON {POSTGRES_INDEX_TABLE} USING gin (document)"
+            )
+        else:
+            return False
+    _available.pop(connection.alias, None)
+    return True
+
+
+def drop_index(connection=default_connection):
+    table = _index_table(connection)
+    if table:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    _available.pop(connection.alias, None)
+
+
+def is_available(connection=default_connection):
+    if connection.alias not in _available:
+        table = _index_table(connection)
+        _available[connection.alias] = bool(table) and table in connection.introspection.table_names()
+    return _available[connection.alias]
+
+
+def index_products(product_ids=None, connection=default_connection):
+    """
+    (Re)index the given products, or every product when ``product_ids`` is None
+    """
+    if not is_available(connection):
+        return
+    products = Product._meta.db_table
+    categories = Category._meta.db_table
+    ids = None if product_ids is None else list(product_ids)
+    if ids == []:
+        return
+    if ids is not None and len(ids) > INDEX_BATCH_SIZE:
+        for start in range(0, len(ids), INDEX_BATCH_SIZE):
+            index_products(ids[start:start + INDEX_BATCH_SIZE], connection)
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            if ids is None:
+                cursor.execute(f"DELETE FROM {SQLITE_INDEX_TABLE}")
+                where, params = '', []
+            else:
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(f"DELETE FROM {SQLITE_INDEX_TABLE} WHERE rowid IN ({placeholders})", ids)
+                where, params = f"WHERE p.id IN ({placeholders})", ids
+            cursor.execute(
+                f"INSERT INTO {SQLITE_INDEX_TABLE} (rowid, name, description, sku, category) "
+                f"SELECT p.id, p.name, p.description, COALESCE(p.sku, ''), c.name "
+                f"FROM {products} p JOIN {categories} c ON c.id = p.category_id {where}",
+                params,
+            )
+        else:
+            if ids is None:
+                where, params = '', []
+            else:
+                where, params = 'WHERE p.id = ANY(%s)', [ids]
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_INDEX_TABLE} (product_id, document) "
+                "SELECT p.id, "
+                "setweight(to_tsvector('simple', COALESCE(p.name, '')), 'A') || "
+                "setweight(to_tsvector('simple', COALESCE(p.sku, '')), 'A') || "
+                "setweight(to_tsvector('simple', COALESCE(c.name, '')), 'B') || "
+                "setweight(to_tsvector('simple', COALESCE(p.description, '')), 'C') "
+                f"FROM {products} p JOIN {categories} c ON c.id = p.category_id {where} "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                params,
+            )
+
+
+def remove_products(product_ids, connection=default_connection):
+    ids = list(product_ids)
+    if not ids or not is_available(connection):
+        return
+    table = _index_table(connection)
+    column = 'rowid' if connection.vendor == 'sqlite' else 'product_id'
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), INDEX_BATCH_SIZE):
+            batch = ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", batch)
+
+
+def _terms(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def search_product_ids(text, limit=SEARCH_RESULT_LIMIT, connection=default_connection):
+    """
+    Return product ids matching ``text`` ordered by relevance, treating the
+    last term as a prefix. Returns None when no full-text index is available.
+    """
+    if not is_available(connection):
+        return None
+    terms = _terms(text)
+    if not terms:
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            match = ' '.join(f'"{term}"' for term in terms[:-1])
+            match = f'{match} "{terms[-1]}"*'.strip()
+            # Column weights: name, description, sku, category
+            cursor.execute(
+                f"SELECT rowid FROM {SQLITE_INDEX_TABLE} WHERE {SQLITE_INDEX_TABLE} MATCH %s "
+                f"ORDER BY bm25({SQLITE_INDEX_TABLE}, 10.0, 1.0, 10.0, 4.0) LIMIT %s",
+                [match, limit],
+            )
+        else:
+            query = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+            cursor.execute(
+                f"SELECT product_id FROM {POSTGRES_INDEX_TABLE}, to_tsquery('simple', %s) query "
+                "WHERE document @@ query ORDER BY ts_rank(document, query) DESC LIMIT %s",
+                [query, limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Filter products by the ``search`` query parameter using the full-text index,
+    ordering by relevance unless the client asked for an explicit ordering
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+
+        ids = search_product_ids(text)
+        if ids is None:
+            return queryset.filter(
+                models.Q(name__icontains=text) |
+                models.Q(description__icontains=text) |
+                models.Q(sku__icontains=text) |
+                models.Q(category__name__icontains=text)
+            )
+
+        queryset = queryset.filter(pk__in=ids)
+        if ids and not request.query_params.get('ordering'):
+            rank = models.Case(
+                *[models.When(pk=pk, then=position) for position, pk in enumerate(ids)],
+                output_field=models.IntegerField(),
+            )
+            queryset = queryset.order_by(rank)
+        return queryset
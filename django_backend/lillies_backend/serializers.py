@@ -1,10 +1,25 @@
 from rest_framework import serializers
-from .models import Category, Product, Order, OrderItem
+from .models import Category, Product, Order, OrderItem, PickupSlot, StockReservation
 from django.core.validators import FileExtensionValidator
+from .fieldsets import SparseFieldsetMixin
+from .storage import media_url_builder
 
-class ProductSerializer(serializers.ModelSerializer):
+class MediaImageField(serializers.ImageField):
+    """
+    ImageField whose URL is made absolute with one base URL per response
+    instead of a build_absolute_uri call per file
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return media_url_builder(self.context)(value.url)
+
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
-    image = serializers.ImageField(
+    # Stock minus live holds; see lillies_backend.reservations
+    available_stock = serializers.IntegerField(read_only=True)
+    image = MediaImageField(
         required=False,
         allow_null=True,
         validators=[
@@ -14,8 +29,9 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'image', 'category', 'category_name', 'active', 'stock', 'sku', 'preparation_time', 'calories', 'ingredients', 'allergens', 'is_vegetarian', 'is_vegan', 'is_gluten_free', 'discount_price', 'is_featured', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = ['id', 'name', 'description', 'price', 'image', 'category', 'category_name', 'active', 'stock', 'available_stock', 'sku', 'preparation_time', 'calories', 'ingredients', 'allergens', 'is_vegetarian', 'is_vegan', 'is_gluten_free', 'discount_price', 'is_featured', 'image_variants', 'created_at', 'updated_at']
+        read_only_fields = ['image_variants', 'created_at', 'updated_at']
+        sparse_dependencies = {'available_stock': ['stock', 'reserved']}
 
     def create(self, validated_data):
         return Product.objects.create(**validated_data)
@@ -24,9 +40,7 @@ class ProductSerializer(serializers.ModelSerializer):
         # Handle image update separately
         image = validated_data.pop('image', None)
         if image is not None:
-            # Delete old image if it exists
-            if instance.image:
-                instance.delete_image_if_exists()
+            # The old file may be shared with other products; sweep_media removes it once unreferenced
             instance.image = image
 
         # Update other fields
@@ -38,19 +52,52 @@ class ProductSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        request = self.context.get('request')
-        if request and instance.image:
-            # Build absolute URL for the image
-            data['image'] = request.build_absolute_uri(instance.image.url)
-            print(f"Image URL: {data['image']}")  # Debug print
+        if 'image_variants' in data:
+            data['image_variants'], data['image_srcset'] = self._variant_urls(instance)
         return data
 
+    def _variant_urls(self, instance):
+        """
+        Resolve stored variant names to URLs and build one srcset string per format
+        """
+        if not instance.image_variants:
+            return {}, {}
+        # Read the storage off the field so ?fields=image_variants does not load ``image``
+        storage = Product._meta.get_field('image').storage
+        absolute = media_url_builder(self.context)
+        variants = {}
+        srcset = {}
+        for variant, entry in instance.image_variants.items():
+            variants[variant] = {'width': entry['width']}
+            for format_name, name in entry.items():
+                if format_name == 'width':
+                    continue
+                url = absolute(storage.url(name))
+                variants[variant][format_name] = url
+                srcset.setdefault(format_name, {}).setdefault(entry['width'], url)
+        srcset = {
+            format_name: ', '.join(f'{url} {width}w' for width, url in sorted(candidates.items()))
+            for format_name, candidates in srcset.items()
+        }
+        return variants, srcset
+
 class CategorySerializer(serializers.ModelSerializer):
-    products = ProductSerializer(many=True, read_only=True)
+    # Populated by Category.objects.with_product_counts(); absent on plain instances
+    product_count = serializers.IntegerField(read_only=True)
+    active_product_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'created_at', 'updated_at', 'products']
+        fields = ['id', 'name', 'description', 'created_at', 'updated_at', 'product_count', 'active_product_count']
+
+class CategoryWithProductsSerializer(CategorySerializer):
+    """
+    Category representation that nests its active products, used for ?expand=products
+    """
+    products = ProductSerializer(source='active_products', many=True, read_only=True)
+
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ['products']
 
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -60,9 +107,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ['id', 'product', 'product_name', 'product_price', 'quantity', 'price']
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     customer_email = serializers.EmailField(read_only=True)
+    # Expected ready time from the kitchen schedule; null once the order is done
+    eta = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Order
@@ -70,6 +119,104 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'customer', 'customer_name', 'customer_email', 
             'contact_number', 'shipping_address', 'status', 
             'order_date', 'created_at', 'updated_at', 
-            'total_amount', 'items'
+            'total_amount', 'due_at', 'eta', 'items'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'order_date']
+        # Orders are created through checkout, which prices them and takes stock
+        read_only_fields = ['customer', 'total_amount', 'created_at', 'updated_at', 'order_date']
+        sparse_dependencies = {'eta': ['status']}
+
+    def validate_status(self, value):
+        # Later statuses are reached through the order state machine
+        if self.instance is None and value != 'pending':
+            raise serializers.ValidationError('New orders start as pending.')
+        return value
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Order list row for the "My orders" screen; works on ``values()`` dicts
+    """
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'total_amount', 'created_at']
+
+
+class PricingRuleSerializer(serializers.Serializer):
+    """
+    One bulk pricing rule. ``percentage`` and ``absolute`` set discount_price
+    below the regular price; ``clear`` removes the discount.
+    """
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+    skus = serializers.ListField(child=serializers.CharField(max_length=100), required=False, allow_empty=False)
+    type = serializers.ChoiceField(choices=['percentage', 'absolute', 'clear'])
+    value = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+
+    def validate(self, attrs):
+        if 'category' not in attrs and 'skus' not in attrs:
+            raise serializers.ValidationError('A rule needs a category or a list of skus.')
+        if attrs['type'] != 'clear' and 'value' not in attrs:
+            raise serializers.ValidationError({'value': 'This field is required.'})
+        if attrs['type'] == 'percentage' and attrs['value'] >= 100:
+            raise serializers.ValidationError({'value': 'A percentage must be below 100.'})
+        return attrs
+
+class BulkPricingSerializer(serializers.Serializer):
+    rules = PricingRuleSerializer(many=True, allow_empty=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+class ImageUploadSerializer(serializers.Serializer):
+    """
+    Request for a direct-to-storage product image upload. The client hashes
+    the file first so the stored name is known before any bytes are sent.
+    """
+    CONTENT_TYPES = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif'}
+
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$')
+    content_type = serializers.ChoiceField(choices=list(CONTENT_TYPES))
+
+    def validate_sha256(self, value):
+        return value.lower()
+
+class ImageConfirmSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+
+class CheckoutItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, max_value=100)
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    A cart submitted for checkout. Prices and the total are always computed
+    server-side; only products, quantities and delivery details are accepted.
+    """
+    # Omit to check out the caller's server-side cart
+    items = CheckoutItemSerializer(many=True, allow_empty=False, required=False)
+    customer_name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    contact_number = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    shipping_address = serializers.CharField(required=False, allow_blank=True)
+    # Start of one of the slots from /api/menu/slots/; defaults to the earliest with room
+    pickup_at = serializers.DateTimeField(required=False)
+
+class PickupSlotSerializer(serializers.ModelSerializer):
+    remaining_minutes = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = PickupSlot
+        fields = ['starts_at', 'capacity_minutes', 'remaining_minutes']
+
+class StockHoldSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    # 0 releases the hold
+    quantity = serializers.IntegerField(min_value=0, max_value=100)
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    available_stock = serializers.IntegerField(source='product.available_stock', read_only=True)
+
+    class Meta:
+        model = StockReservation
+        fields = ['product', 'quantity', 'expires_at', 'available_stock']
+
+class CartLineSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    # 0 removes the line
+    quantity = serializers.IntegerField(min_value=0, max_value=100)
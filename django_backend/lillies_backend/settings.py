@@ -161,11 +161,16 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
+    'x-cart-token',
 ]
 
 CORS_EXPOSE_HEADERS = [
     'access-control-allow-origin',
     'access-control-allow-credentials',
+    'etag',
+    'idempotent-replayed',
+    'last-modified',
 ]
 
 CORS_PREFLIGHT_MAX_AGE = 86400  # 24 hours
@@ -215,6 +220,93 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Default page size for list endpoints using lillies_backend.pagination
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+
+# Caches. Without CACHE_URL each process keeps its own in-memory cache, which
+# is fine for development; set CACHE_URL (redis://...) so that menu payloads,
+# idempotency keys and carts are shared by every app node. Carts get their own
+# alias so they can live in a separate, persistent store via CART_CACHE_URL.
+CACHE_URL = os.getenv('CACHE_URL')
+CART_CACHE_URL = os.getenv('CART_CACHE_URL') or CACHE_URL
+CART_TTL = int(os.getenv('CART_TTL', str(30 * 24 * 60 * 60)))
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'lillies',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'lillies-default',
+        },
+    }
+
+if CART_CACHE_URL:
+    CACHES['carts'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CART_CACHE_URL,
+        'KEY_PREFIX': 'lillies-carts',
+        'TIMEOUT': CART_TTL,
+    }
+else:
+    CACHES['carts'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lillies-carts',
+        'TIMEOUT': CART_TTL,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+# How long responses to requests carrying an Idempotency-Key are replayed
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', str(24 * 60 * 60)))
+
+# How long a cart's stock hold lasts before sweep_reservations releases it
+STOCK_HOLD_TTL = int(os.getenv('STOCK_HOLD_TTL', str(15 * 60)))
+
+# Order and menu events pushed to /api/events/. "local" only reaches clients of
+# the publishing process; "redis" fans out to every ASGI worker via EVENTS_URL.
+EVENTS_URL = os.getenv('EVENTS_URL') or CACHE_URL
+EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'redis' if EVENTS_URL else 'local')
+# Seconds between keep-alive comments on idle event streams
+EVENTS_HEARTBEAT = int(os.getenv('EVENTS_HEARTBEAT', '15'))
+
+# Kitchen stations and how many orders each cooks at once, as "name:count,...",
+# and which station each category's items go to, as "Category:station,...".
+# Categories without a station use the first one.
+KITCHEN_STATIONS = {
+    name.strip(): int(count)
+    for name, count in (item.split(':') for item in os.getenv('KITCHEN_STATIONS', 'kitchen:2').split(','))
+}
+KITCHEN_CATEGORY_STATIONS = {
+    category.strip(): station.strip()
+    for category, station in (
+        item.rsplit(':', 1) for item in os.getenv('KITCHEN_CATEGORY_STATIONS', '').split(',') if item
+    )
+}
+# Seconds between reloads of the in-memory kitchen schedule from open orders
+KITCHEN_SCHEDULE_REFRESH = int(os.getenv('KITCHEN_SCHEDULE_REFRESH', '60'))
+
+# Seconds between rebuilds of the in-memory search suggestion index, which
+# otherwise only sees catalog changes made by its own worker
+SUGGEST_INDEX_REFRESH = int(os.getenv('SUGGEST_INDEX_REFRESH', '300'))
+# Likewise for the in-memory product facet index
+FACET_INDEX_REFRESH = int(os.getenv('FACET_INDEX_REFRESH', '300'))
+
+# Pickup slots: length in minutes, preparation minutes each slot can take, and
+# how many upcoming slots are offered and bookable
+PICKUP_SLOT_MINUTES = int(os.getenv('PICKUP_SLOT_MINUTES', '15'))
+PICKUP_SLOT_CAPACITY = int(os.getenv('PICKUP_SLOT_CAPACITY', '120'))
+PICKUP_SLOT_HORIZON = int(os.getenv('PICKUP_SLOT_HORIZON', '32'))
+
+# Generate product image variants on a background thread after upload. Disable
+# where threads do not outlive the response (e.g. Lambda) to build them inline.
+IMAGE_PROCESSING_ASYNC = os.getenv('IMAGE_PROCESSING_ASYNC', 'True') == 'True'
+
 # Simple JWT settings for custom user model with email
 SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
@@ -236,13 +328,43 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
-# Configure WhiteNoise for static file serving in production
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
-
 # Media files (Uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media storage backend. 'filesystem' keeps files under MEDIA_ROOT (development
+# and tests); 's3' targets an S3-compatible bucket so that no app node, Lambda
+# included, depends on its local disk. Both name files by content hash.
+MEDIA_STORAGE = os.getenv('MEDIA_STORAGE', 'filesystem')
+MEDIA_UPLOAD_EXPIRY = int(os.getenv('MEDIA_UPLOAD_EXPIRY', '900'))
+MEDIA_UPLOAD_MAX_BYTES = int(os.getenv('MEDIA_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+
+if MEDIA_STORAGE == 's3':
+    MEDIA_BACKEND = {
+        'BACKEND': 'lillies_backend.storage.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.getenv('MEDIA_BUCKET'),
+            'endpoint_url': os.getenv('MEDIA_S3_ENDPOINT_URL'),
+            'region_name': os.getenv('MEDIA_S3_REGION'),
+            'public_url': os.getenv('MEDIA_PUBLIC_URL'),
+            'location': os.getenv('MEDIA_S3_LOCATION', ''),
+        },
+    }
+else:
+    MEDIA_BACKEND = {
+        'BACKEND': 'lillies_backend.storage.ContentAddressedFileSystemStorage',
+    }
+
+STORAGES = {
+    'default': MEDIA_BACKEND,
+    # Replaces the STATICFILES_STORAGE setting, which Django 5.1 ignores and
+    # which cannot be combined with STORAGES. WhiteNoise still serves these;
+    # its manifest storage would need collectstatic in the build step.
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Category, Order, Product
+from . import allergens, carts, events, facets, kitchen, menu_cache, search, suggest
+
+# Sent once after set-based writes (bulk imports, price updates) that bypass
+# per-instance save signals. Provides ``product_ids``.
+products_bulk_changed = Signal()
+
+
+def _wrote(kwargs, *fields):
+    """
+    Whether a post_save wrote any of ``fields``. Product saves pass
+    ``update_fields`` with only the changed columns (see TrackedFieldsMixin),
+    so receivers can skip work for unrelated edits such as stock changes.
+    """
+    update_fields = kwargs.get('update_fields')
+    return update_fields is None or not update_fields.isdisjoint(fields)
+
+
+@receiver(post_save, sender=Product)
+def invalidate_menu_cache(sender, **kwargs):
+    # Stock reaches the menu through the availability overlay instead
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or not update_fields <= {'stock', 'reserved', 'updated_at'}:
+        transaction.on_commit(menu_cache.bump_menu_version)
+
+
+@receiver(post_delete, sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver(products_bulk_changed)
+def invalidate_menu_cache_after_change(sender, **kwargs):
+    transaction.on_commit(menu_cache.bump_menu_version)
+
+
+@receiver(post_save, sender=Product)
+def reprice_carts(sender, instance, **kwargs):
+    # Stock changes are not priced into carts, so they leave carts alone
+    if _wrote(kwargs, 'name', 'price', 'discount_price', 'active'):
+        transaction.on_commit(carts.bump_price_version)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(products_bulk_changed)
+def reprice_carts_after_bulk_change(sender, **kwargs):
+    transaction.on_commit(carts.bump_price_version)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    if _wrote(kwargs, 'name', 'description', 'sku', 'category', 'category_id'):
+        search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    # Category names are part of each product's search document
+    if not created:
+        search.index_products(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Product)
+def update_product_suggestions(sender, instance, **kwargs):
+    if _wrote(kwargs, 'name', 'sku', 'active'):
+        suggest.product_changed(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_suggestions(sender, instance, **kwargs):
+    suggest.product_removed(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def update_category_suggestions(sender, instance, **kwargs):
+    suggest.category_changed(instance)
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_suggestions(sender, instance, **kwargs):
+    suggest.category_removed(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def update_product_facets(sender, instance, **kwargs):
+    if _wrote(kwargs, 'category', 'category_id', *facets.FACETS):
+        facets.product_changed(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_facets(sender, instance, **kwargs):
+    facets.product_removed(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def sync_product_allergens(sender, instance, **kwargs):
+    if _wrote(kwargs, 'allergens'):
+        allergens.sync_products([instance])
+
+
+@receiver(products_bulk_changed)
+def refresh_bulk_changed_products(sender, product_ids, **kwargs):
+    product_ids = list(product_ids)
+    search.index_products(product_ids)
+    for start in range(0, len(product_ids), 1000):
+        batch = product_ids[start:start + 1000]
+        allergens.sync_products(Product.objects.filter(pk__in=batch).only('id', 'allergens'))
+    # The in-memory indexes rebuild lazily on their next read
+    suggest.reset()
+    facets.reset()
+
+
+@receiver(post_save, sender=Order)
+def publish_order_saved(sender, instance, created, update_fields=None, **kwargs):
+    # orders.transition() publishes its own status changes; this covers
+    # new orders and saves that explicitly write the status (e.g. the admin)
+    if created:
+        events.order_created(instance)
+    elif update_fields and 'status' in update_fields:
+        transaction.on_commit(lambda: kitchen.order_status_changed(instance))
+        events.order_status_changed(instance)
+
+
+@receiver(post_save, sender=Product)
+def publish_sold_out(sender, instance, created, **kwargs):
+    if not created and _wrote(kwargs, 'stock', 'reserved') and instance.available_stock == 0:
+        events.products_sold_out([(instance.pk, instance.name)])
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PickupSlot
+
+PICKUP_SLOT_MINUTES = getattr(settings, 'PICKUP_SLOT_MINUTES', 15)
+PICKUP_SLOT_CAPACITY = getattr(settings, 'PICKUP_SLOT_CAPACITY', 120)
+PICKUP_SLOT_HORIZON = getattr(settings, 'PICKUP_SLOT_HORIZON', 32)
+
+
+class SlotError(Exception):
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _slot_seconds():
+    return PICKUP_SLOT_MINUTES * 60
+
+
+def upcoming_starts(now=None, count=PICKUP_SLOT_HORIZON):
+    """
+    Start times of the next ``count`` slots, beginning with the first one
+    that has not started yet
+    """
+    now = now or timezone.now()
+    seconds = _slot_seconds()
+    first = -(-int(now.timestamp()) // seconds) * seconds
+    return [datetime.fromtimestamp(first + index * seconds, tz=dt_timezone.utc) for index in range(count)]
+
+
+def order_minutes(lines):
+    """
+    Preparation minutes an order books: ``lines`` are (preparation_time,
+    quantity) pairs
+    """
+    return sum((preparation_time or 0) * quantity for preparation_time, quantity in lines)
+
+
+def available_slots(now=None, count=PICKUP_SLOT_HORIZON, ready_at=None):
+    """
+    The upcoming slots with their remaining capacity, leaving out those
+    starting before ``ready_at``. Slots nobody booked yet have no row and
+    are reported at full capacity.
+    """
+    starts = [start for start in upcoming_starts(now, count) if ready_at is None or start >= ready_at]
+    booked = {
+        slot.starts_at: slot
+        for slot in PickupSlot.objects.filter(starts_at__in=starts)
+    }
+    return [
+        booked.get(start) or PickupSlot(starts_at=start, capacity_minutes=PICKUP_SLOT_CAPACITY)
+        for start in starts
+    ]
+
+
+def book(minutes, starts_at=None, now=None, ready_at=None):
+    """
+    Add ``minutes`` to a slot's counter and return the slot: the requested
+    one, or else the earliest upcoming slot with room. Slots starting before
+    ``ready_at``, when the kitchen can have the order ready, are refused.
+    Each attempt is one conditional UPDATE, so concurrent checkouts cannot
+    overbook a slot. An order larger than a whole slot still fits into an
+    empty one.
+    """
+    starts = upcoming_starts(now)
+    if starts_at is not None:
+        if starts_at not in starts:
+            raise SlotError('Choose one of the upcoming pickup slots', status=400)
+        if ready_at is not None and starts_at < ready_at:
+            raise SlotError('The kitchen cannot have this order ready by then, choose a later slot')
+        starts = [starts_at]
+    elif ready_at is not None:
+        starts = [start for start in starts if start >= ready_at]
+
+    slots = list(PickupSlot.objects.filter(starts_at__in=starts).order_by('starts_at'))
+    if len(slots) < len(starts):
+        # Slots get their row the first time anyone books them
+        existing = {slot.starts_at for slot in slots}
+        PickupSlot.objects.bulk_create(
+            [PickupSlot(starts_at=start, capacity_minutes=PICKUP_SLOT_CAPACITY) for start in starts if start not in existing],
+            ignore_conflicts=True,
+        )
+        slots = list(PickupSlot.objects.filter(starts_at__in=starts).order_by('starts_at'))
+
+    fits = Q(booked_minutes=0) | Q(booked_minutes__lte=F('capacity_minutes') - minutes)
+    for slot in slots:
+        if slot.booked_minutes and slot.booked_minutes + minutes > slot.capacity_minutes:
+            continue
+        if PickupSlot.objects.filter(fits, pk=slot.pk).update(booked_minutes=F('booked_minutes') + minutes):
+            slot.booked_minutes += minutes
+            return slot
+    if starts_at is not None:
+        raise SlotError('This pickup slot is full')
+    raise SlotError('The kitchen is at capacity, please try again later')
+
+
+def release(order):
+    """
+    Give an order's minutes back to its slot, e.g. when it is cancelled
+    """
+    if order.pickup_slot_id and order.slot_minutes:
+        PickupSlot.objects.filter(pk=order.pickup_slot_id).update(
+            booked_minutes=F('booked_minutes') - order.slot_minutes
+        )
@@ -0,0 +1,244 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage, storages
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+
+# Content-addressed names never change content, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CONTENT_ADDRESSED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}\.[0-9a-z]+$')
+
+UPLOAD_SIGNING_SALT = 'lillies_backend.storage.upload'
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_ADDRESSED_NAME.search(name or ''))
+
+
+def content_addressed_name(directory, digest, extension):
+    return posixpath.join(directory, digest[:2], digest + extension.lower())
+
+
+class ContentAddressedMixin:
+    """
+    Storage mixin that names every file after the sha256 of its content:
+    ``<dir>/<first two hex chars>/<sha256>.<ext>``. The directory and extension
+    of the requested name are kept; the rest of it is ignored. Saving content
+    that is already stored returns the existing name without writing again.
+
+    Because files are shared between records, nothing may delete them on
+    save; the ``sweep_media`` command counts references and removes files
+    nothing points at any more. Reusing an existing file touches it, so the
+    sweep's grace period covers content that was just referenced again.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        directory, filename = posixpath.split(str(name).replace('\\', '/'))
+        if is_content_addressed(name):
+            # Already a content-addressed name: keep it rather than nesting it
+            directory = posixpath.dirname(directory)
+        name = content_addressed_name(directory, content_hash(content), os.path.splitext(filename)[1])
+        if self.exists(name):
+            self.touch(name)
+            return name
+        # Two concurrent uploads of the same content can still race past
+        # exists(); the loser gets a suffixed duplicate, which is harmless
+        return super().save(name, content, max_length=max_length)
+
+
+@deconstructible
+class ContentAddressedFileSystemStorage(ContentAddressedMixin, FileSystemStorage):
+    """
+    Local stand-in for the object store. Direct uploads go to a signed URL
+    served by this app instead of a bucket.
+    """
+
+    def touch(self, name):
+        os.utime(self.path(name))
+
+    def upload_target(self, name, sha256, content_type, expires):
+        token = signing.dumps(
+            {'name': name, 'sha256': sha256, 'content_type': content_type},
+            salt=UPLOAD_SIGNING_SALT,
+        )
+        return {
+            'method': 'PUT',
+            'url': reverse('media-upload', args=[token]),
+            'headers': {'Content-Type': content_type},
+        }
+
+
+@deconstructible
+class S3Storage(ContentAddressedMixin, Storage):
+    """
+    Content-addressed storage in an S3-compatible bucket. Objects are written
+    with an immutable Cache-Control header and served from ``public_url``
+    (a CDN or the bucket endpoint), so app nodes never serve media themselves.
+    """
+
+    def __init__(self, bucket_name=None, endpoint_url=None, region_name=None,
+                 public_url=None, location=''):
+        self.bucket_name = bucket_name
+        self.endpoint_url = endpoint_url
+        self.region_name = region_name
+        self.public_url = public_url
+        self.location = (location or '').strip('/')
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise ImproperlyConfigured('boto3 is required for S3 media storage (pip install boto3)')
+            if not self.bucket_name:
+                raise ImproperlyConfigured('S3 media storage needs a bucket_name')
+            self._client = boto3.client('s3', endpoint_url=self.endpoint_url, region_name=self.region_name)
+        return self._client
+
+    def _key(self, name):
+        return posixpath.join(self.location, name) if self.location else name
+
+    def _open(self, name, mode='rb'):
+        response = self.client.get_object(Bucket=self.bucket_name, Key=self._key(name))
+        return ContentFile(response['Body'].read(), name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        self.client.put_object(
+            Bucket=self.bucket_name,
+            Key=self._key(name),
+            Body=content.read(),
+            ContentType=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+        return name
+
+    def _head(self, name):
+        client = self.client
+        from botocore.exceptions import ClientError
+
+        try:
+            return client.head_object(Bucket=self.bucket_name, Key=self._key(name))
+        except ClientError as exc:
+            if exc.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def exists(self, name):
+        return self._head(name) is not None
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket_name, Key=self._key(name))
+
+    def touch(self, name):
+        # Objects are immutable; copying one onto itself refreshes LastModified
+        key = self._key(name)
+        self.client.copy_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            CopySource={'Bucket': self.bucket_name, 'Key': key},
+            MetadataDirective='REPLACE',
+            ContentType=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+
+    def size(self, name):
+        return self._head(name)['ContentLength']
+
+    def get_modified_time(self, name):
+        return self._head(name)['LastModified']
+
+    def listdir(self, path):
+        prefix = self._key(path).strip('/')
+        prefix = f'{prefix}/' if prefix else ''
+        directories, files = [], []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix, Delimiter='/'):
+            directories.extend(entry['Prefix'][len(prefix):].rstrip('/') for entry in page.get('CommonPrefixes', []))
+            files.extend(entry['Key'][len(prefix):] for entry in page.get('Contents', []))
+        return directories, files
+
+    def url(self, name):
+        base = self.public_url
+        if not base:
+            endpoint = self.endpoint_url or f'https://s3.{self.region_name or "us-east-1"}.amazonaws.com'
+            base = f'{endpoint.rstrip("/")}/{self.bucket_name}'
+        return f'{base.rstrip("/")}/{quote(self._key(name))}'
+
+    def upload_target(self, name, sha256, content_type, expires):
+        # The signed checksum makes the bucket reject bodies that do not hash
+        # to the content-addressed name
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': self.bucket_name,
+                'Key': self._key(name),
+                'ContentType': content_type,
+                'CacheControl': IMMUTABLE_CACHE_CONTROL,
+                'ChecksumSHA256': checksum,
+            },
+            ExpiresIn=expires,
+        )
+        return {
+            'method': 'PUT',
+            'url': url,
+            'headers': {
+                'Content-Type': content_type,
+                'Cache-Control': IMMUTABLE_CACHE_CONTROL,
+                'x-amz-checksum-sha256': checksum,
+            },
+        }
+
+
+def product_image_storage():
+    return storages['default']
+
+
+def media_url_builder(context):
+    """
+    Return a function turning storage URLs into absolute URLs. The request's
+    base URL is resolved once per serializer context rather than once per
+    file, and URLs the storage already made absolute pass through unchanged.
+    """
+    builder = context.get('_media_url_builder')
+    if builder is None:
+        request = context.get('request')
+        base = request.build_absolute_uri('/').rstrip('/') if request else ''
+
+        def builder(url):
+            if not url or '://' in url or url.startswith('//'):
+                return url
+            return base + url
+
+        context['_media_url_builder'] = builder
+    return builder
+
+
+def upload_expiry():
+    return getattr(settings, 'MEDIA_UPLOAD_EXPIRY', 900)
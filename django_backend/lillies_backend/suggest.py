@@ -0,0 +1,202 @@
+import bisect
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .models import Category, Product, OrderItem
+
+# Stop collecting candidates once this many distinct entries matched the prefix;
+# very short prefixes would otherwise walk most of the index.
+MAX_CANDIDATES = 200
+# Other workers' catalog changes are only picked up on rebuild, so this
+# bounds how stale suggestions get
+SUGGEST_INDEX_REFRESH = getattr(settings, 'SUGGEST_INDEX_REFRESH', 300)
+
+
+def _normalize(text):
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+
+def _terms_for(*texts):
+    """
+    Index the whole normalized text plus every word in it, so "bur" matches
+    "Fancy Burger" as well as "Burger Deluxe"
+    """
+    terms = set()
+    for text in texts:
+        normalized = _normalize(text)
+        if not normalized:
+            continue
+        terms.add(normalized)
+        terms.update(normalized.split())
+    return terms
+
+
+class PrefixIndex:
+    """
+    In-process prefix index kept as a sorted array of (term, kind, id) tuples
+    and searched with bisect
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def build(self, entries):
+        keys = []
+        table = {}
+        for entry in entries:
+            table[(entry['type'], entry['id'])] = entry
+            keys.extend((term, entry['type'], entry['id']) for term in entry['terms'])
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = table
+
+    def upsert(self, entry):
+        with self._lock:
+            self._remove_locked(entry['type'], entry['id'])
+            self._entries[(entry['type'], entry['id'])] = entry
+            for term in entry['terms']:
+                bisect.insort(self._keys, (term, entry['type'], entry['id']))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._remove_locked(kind, pk)
+
+    def _remove_locked(self, kind, pk):
+        entry = self._entries.pop((kind, pk), None)
+        if entry is None:
+            return
+        for term in entry['terms']:
+            position = bisect.bisect_left(self._keys, (term, kind, pk))
+            if position < len(self._keys) and self._keys[position] == (term, kind, pk):
+                del self._keys[position]
+
+    def get(self, kind, pk):
+        return self._entries.get((kind, pk))
+
+    def suggest(self, prefix, limit=10):
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            keys, entries = self._keys, self._entries
+            matches = {}
+            position = bisect.bisect_left(keys, (prefix,))
+            while position < len(keys) and len(matches) < MAX_CANDIDATES:
+                term, kind, pk = keys[position]
+                if not term.startswith(prefix):
+                    break
+                matches[(kind, pk)] = entries[(kind, pk)]
+                position += 1
+        ranked = sorted(matches.values(), key=lambda entry: (-entry['popularity'], entry['label']))
+        return [
+            {'type': entry['type'], 'id': entry['id'], 'label': entry['label'], 'sku': entry.get('sku')}
+            for entry in ranked[:limit]
+        ]
+
+
+_index = None
+_built_at = 0
+_index_guard = threading.Lock()
+
+
+def _product_entry(product_id, name, sku, popularity):
+    return {
+        'type': 'product',
+        'id': product_id,
+        'label': name,
+        'sku': sku,
+        'terms': _terms_for(name, sku),
+        'popularity': popularity,
+    }
+
+
+def _category_entry(category_id, name, popularity):
+    return {
+        'type': 'category',
+        'id': category_id,
+        'label': name,
+        'terms': _terms_for(name),
+        'popularity': popularity,
+    }
+
+
+def _load_entries():
+    sold = dict(
+        OrderItem.objects.values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('product_id', 'total')
+    )
+    category_popularity = {}
+    entries = []
+    for pk, name, sku, category_id in Product.objects.filter(active=True).values_list(
+        'id', 'name', 'sku', 'category_id'
+    ):
+        popularity = sold.get(pk) or 0
+        category_popularity[category_id] = category_popularity.get(category_id, 0) + popularity
+        entries.append(_product_entry(pk, name, sku, popularity))
+    for pk, name in Category.objects.values_list('id', 'name'):
+        entries.append(_category_entry(pk, name, category_popularity.get(pk, 0)))
+    return entries
+
+
+def get_index():
+    """
+    Return the process-wide suggestion index, building it on first use and
+    again every SUGGEST_INDEX_REFRESH seconds
+    """
+    global _index, _built_at
+    if _index is None or time.monotonic() - _built_at > SUGGEST_INDEX_REFRESH:
+        with _index_guard:
+            if _index is None or time.monotonic() - _built_at > SUGGEST_INDEX_REFRESH:
+                index = PrefixIndex()
+                index.build(_load_entries())
+                _index, _built_at = index, time.monotonic()
+    return _index
+
+
+def product_changed(product):
+    """
+    Apply a single product change to the index if it has been built
+    """
+    if _index is None:
+        return
+    if not product.active:
+        _index.remove('product', product.pk)
+        return
+    existing = _index.get('product', product.pk)
+    popularity = existing['popularity'] if existing else 0
+    _index.upsert(_product_entry(product.pk, product.name, product.sku, popularity))
+
+
+def product_removed(product_id):
+    if _index is not None:
+        _index.remove('product', product_id)
+
+
+def category_changed(category):
+    if _index is None:
+        return
+    existing = _index.get('category', category.pk)
+    popularity = existing['popularity'] if existing else 0
+    _index.upsert(_category_entry(category.pk, category.name, popularity))
+
+
+def category_removed(category_id):
+    if _index is not None:
+        _index.remove('category', category_id)
+
+
+def reset():
+    """
+    Drop the index so the next suggestion rebuilds it from the database
+    """
+    global _index
+    with _index_guard:
+        _index = None
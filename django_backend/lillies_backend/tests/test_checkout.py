@@ -0,0 +1,109 @@
+import threading
+from decimal import Decimal
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from lillies_backend import checkout, kitchen
+from lillies_backend.models import Category, Order, Product
+
+User = get_user_model()
+
+
+def clear_caches():
+    for alias in ('default', 'carts'):
+        caches[alias].clear()
+    kitchen.reset()
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.customer = User.objects.create_user(email='customer@example.com', password='x', name='Customer')
+        category = Category.objects.create(name='Burgers')
+        self.product = Product.objects.create(
+            name='Burger', description='', price=Decimal('8.50'), category=category,
+            stock=5, sku='BURGER', preparation_time=10,
+        )
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.customer)
+
+    def test_order_create_prices_server_side_and_takes_stock(self):
+        response = self.client.post('/api/orders/', {
+            'items': [{'product': self.product.pk, 'quantity': 2}],
+            'total_amount': '0.01',
+        }, format='json', secure=True)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.json()['total_amount']), Decimal('17.00'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_order_create_rejects_client_total_without_items(self):
+        response = self.client.post('/api/orders/', {'total_amount': '0.01'}, format='json', secure=True)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_last_unit_is_sold_once(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=1)
+        checkout.place_order(self.customer, [{'product': self.product.pk, 'quantity': 1}])
+
+        with self.assertRaises(checkout.CheckoutError) as raised:
+            checkout.place_order(self.customer, [{'product': self.product.pk, 'quantity': 1}])
+
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(raised.exception.product_ids, [self.product.pk])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite serialises writers, so checkouts never overlap')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Many customers racing for the last units: the conditional UPDATEs must
+    sell exactly the stock there is
+    """
+    buyers = 8
+
+    def setUp(self):
+        clear_caches()
+        category = Category.objects.create(name='Burgers')
+        self.product = Product.objects.create(
+            name='Burger', description='', price=Decimal('8.50'), category=category,
+            stock=3, sku='BURGER', preparation_time=1,
+        )
+        self.customers = [
+            User.objects.create_user(email=f'customer{index}@example.com', password='x', name='Customer')
+            for index in range(self.buyers)
+        ]
+
+    def test_concurrent_checkouts_do_not_oversell(self):
+        barrier = threading.Barrier(self.buyers)
+        results = []
+
+        def buy(customer):
+            try:
+                barrier.wait()
+                checkout.place_order(customer, [{'product': self.product.pk, 'quantity': 1}])
+                results.append('sold')
+            except checkout.CheckoutError as e:
+                results.append(e.status)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(customer,)) for customer in self.customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('sold'), 3)
+        self.assertEqual(results.count(409), self.buyers - 3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(Order.objects.count(), 3)
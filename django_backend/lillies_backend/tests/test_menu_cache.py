@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lillies_backend import availability, menu_cache
+from lillies_backend.models import Category, Product
+from lillies_backend.tests.test_checkout import clear_caches
+
+
+class MenuCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.category = Category.objects.create(name='Burgers')
+        self.product = Product.objects.create(
+            name='Burger', description='', price=Decimal('8.50'), category=self.category, stock=5, sku='BURGER',
+        )
+        self.client = APIClient(HTTP_HOST='localhost')
+
+    def menu(self):
+        response = self.client.get('/api/menu/items/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item for item in response.json()}
+
+    def test_warm_menu_reads_no_catalog_tables(self):
+        self.menu()
+        availability.stock_levels()
+
+        with self.assertNumQueries(0):
+            self.menu()
+
+    def test_product_save_and_delete_move_the_version(self):
+        self.menu()
+
+        self.product.name = 'Cheeseburger'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        self.assertEqual(self.menu()[self.product.pk]['name'], 'Cheeseburger')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertEqual(self.menu(), {})
+
+    def test_stock_changes_keep_the_cached_payload(self):
+        self.menu()
+        version = menu_cache.get_menu_version()
+
+        self.product.stock = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        availability.invalidate()
+
+        self.assertEqual(menu_cache.get_menu_version(), version)
+        self.assertEqual(self.menu()[self.product.pk]['available_stock'], 2)
+
+    def test_etag_follows_the_version(self):
+        etag = self.client.get('/api/menu/items/', secure=True)['ETag']
+        self.assertEqual(
+            self.client.get('/api/menu/items/', secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Drinks')
+
+        self.assertEqual(
+            self.client.get('/api/menu/items/', secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
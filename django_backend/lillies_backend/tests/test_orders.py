@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lillies_backend import checkout
+from lillies_backend.models import Category, Product
+from lillies_backend.tests.test_checkout import clear_caches
+
+User = get_user_model()
+
+
+class CancelOrderTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.customer = User.objects.create_user(email='customer@example.com', password='x', name='Customer')
+        category = Category.objects.create(name='Burgers')
+        self.product = Product.objects.create(
+            name='Burger', description='', price=Decimal('8.50'), category=category,
+            stock=5, sku='BURGER', preparation_time=1,
+        )
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.customer)
+        self.order = checkout.place_order(self.customer, [{'product': self.product.pk, 'quantity': 2}])
+
+    def cancel(self):
+        return self.client.patch(f'/api/orders/{self.order.pk}/', {'status': 'cancelled'}, format='json', secure=True)
+
+    def test_cancel_returns_stock_and_slot_minutes(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+        self.assertEqual(self.cancel().status_code, 200)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+        self.order.pickup_slot.refresh_from_db()
+        self.assertEqual(self.order.pickup_slot.booked_minutes, 0)
+
+    def test_cancelling_twice_restocks_once(self):
+        self.cancel()
+        self.cancel()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
@@ -0,0 +1,67 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lillies_backend.models import Category, Product
+from lillies_backend.tests.test_checkout import clear_caches
+
+User = get_user_model()
+
+
+class StaffCatalogToolTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.customer = User.objects.create_user(email='customer@example.com', password='x', name='Customer')
+        self.staff = User.objects.create_user(email='staff@example.com', password='x', name='Staff', is_staff=True)
+        self.category = Category.objects.create(name='Burgers')
+        self.product = Product.objects.create(
+            name='Burger', description='', price=Decimal('8.50'), category=self.category, stock=5, sku='BURGER',
+        )
+        self.client = APIClient(HTTP_HOST='localhost')
+
+    def pricing(self, value):
+        return self.client.post('/api/products/bulk-pricing/', {
+            'rules': [{'category': self.category.pk, 'type': 'percentage', 'value': value}],
+        }, format='json', secure=True)
+
+    def test_customers_cannot_reprice_the_catalog(self):
+        self.client.force_authenticate(self.customer)
+
+        self.assertEqual(self.pricing('10').status_code, 403)
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.discount_price)
+
+    def test_percentage_discounts_stay_below_100(self):
+        self.client.force_authenticate(self.staff)
+
+        self.assertEqual(self.pricing('100').status_code, 400)
+        self.assertEqual(self.pricing('10').status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.discount_price, Decimal('7.65'))
+
+    def test_customers_cannot_use_bulk_or_image_tools(self):
+        self.client.force_authenticate(self.customer)
+        upload = io.BytesIO(b'sku,name,price,category\nBURGER,Free burger,0.01,Burgers\n')
+        upload.name = 'products.csv'
+
+        responses = [
+            self.client.get('/api/products/bulk/?type=csv', secure=True),
+            self.client.post('/api/products/bulk/', {'file': upload}, format='multipart', secure=True),
+            self.client.post(f'/api/products/{self.product.pk}/image-upload/', {}, format='json', secure=True),
+            self.client.post(f'/api/products/{self.product.pk}/image-confirm/', {}, format='json', secure=True),
+        ]
+
+        self.assertEqual([response.status_code for response in responses], [403] * 4)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, 'Burger')
+
+    def test_staff_can_export_the_catalog(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get('/api/products/bulk/?type=jsonl', secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'BURGER', b''.join(response.streaming_content))
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from lillies_backend import reservations
+from lillies_backend.models import Category, Order, OrderItem, Product
+from lillies_backend.tests.test_checkout import clear_caches
+
+User = get_user_model()
+
+# Queries each list endpoint runs from cold caches, whatever the table sizes:
+# cached menu payloads, stock levels and the kitchen schedule all load inside
+# the measured request
+QUERY_BUDGETS = {
+    '/api/products/': 3,
+    # Sparse rows still carry the cursor's ordering columns
+    '/api/products/?fields=id,name&page_size=2': 3,
+    '/api/categories/': 3,
+    '/api/categories/?expand=products': 4,
+    '/api/menu/items/': 3,
+    '/api/menu/categories/': 3,
+    '/api/menu/slots/': 3,
+    '/api/orders/': 4,
+    '/api/orders/mine/': 4,
+    '/api/orders/mine/?summary=1': 1,
+    '/api/dashboard/stats/': 11,
+}
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(email='staff@example.com', password='x', name='Staff', is_staff=True)
+        cls.categories = [Category.objects.create(name=f'Category {index}') for index in range(3)]
+        cls.seed(10)
+
+    @classmethod
+    def seed(cls, count):
+        start = Product.objects.count()
+        products = Product.objects.bulk_create(
+            Product(
+                name=f'Product {index}', description='', price=Decimal('9.99'),
+                category=cls.categories[index % len(cls.categories)], stock=10, sku=f'SKU-{index}',
+                # Short enough that the open orders leave bookable slots
+                preparation_time=1,
+            )
+            for index in range(start, start + count)
+        )
+        orders = Order.objects.bulk_create(
+            Order(customer=cls.staff, customer_email=cls.staff.email, total_amount=Decimal('19.98'))
+            for _ in range(count)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=quantity, price=Decimal('9.99'))
+            for order, product in zip(orders, products)
+            for quantity in (1, 1)
+        )
+        reservations.hold(reservations.user_holder(cls.staff), products[0].pk, 2)
+
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.staff)
+
+    def assertWithinBudgets(self):
+        for url, budget in QUERY_BUDGETS.items():
+            with self.subTest(url=url):
+                clear_caches()
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url, secure=True)
+                self.assertEqual(response.status_code, 200)
+
+    def test_list_endpoints_stay_within_budget(self):
+        self.assertWithinBudgets()
+
+    def test_budgets_do_not_grow_with_the_tables(self):
+        self.seed(40)
+        self.assertWithinBudgets()
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from lillies_backend import checkout, kitchen, slots
+from lillies_backend.models import Category, Product
+from lillies_backend.tests.test_checkout import clear_caches
+
+User = get_user_model()
+
+
+class PickupSlotLeadTimeTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.customer = User.objects.create_user(email='customer@example.com', password='x', name='Customer')
+        category = Category.objects.create(name='Burgers')
+        self.burger = Product.objects.create(
+            name='Burger', description='', price=Decimal('8.50'), category=category,
+            stock=100, sku='BURGER', preparation_time=20,
+        )
+
+    def place(self, quantity, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return checkout.place_order(self.customer, [{'product': self.burger.pk, 'quantity': quantity}], **kwargs)
+
+    def test_booked_slot_leaves_time_for_every_unit(self):
+        order = self.place(2)
+
+        self.assertGreaterEqual(order.due_at, timezone.now() + timedelta(minutes=40) - timedelta(seconds=5))
+        self.assertLessEqual(kitchen.eta(order), order.due_at)
+
+    def test_booked_slot_waits_for_queued_orders(self):
+        # Both cooks are busy for an hour
+        self.place(3)
+        self.place(3)
+
+        order = self.place(1)
+
+        self.assertGreaterEqual(order.due_at, timezone.now() + timedelta(minutes=80) - timedelta(seconds=5))
+        self.assertLessEqual(kitchen.eta(order), order.due_at)
+
+    def test_requested_slot_the_kitchen_cannot_make_is_refused(self):
+        with self.assertRaises(checkout.CheckoutError) as raised:
+            self.place(2, pickup_at=slots.upcoming_starts()[0])
+
+        self.assertEqual(raised.exception.status, 409)
+        self.burger.refresh_from_db()
+        self.assertEqual(self.burger.stock, 100)
+
+    def test_menu_lists_only_slots_the_kitchen_can_make(self):
+        self.place(3)
+        self.place(3)
+
+        response = APIClient(HTTP_HOST='localhost').get('/api/menu/slots/', secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        first = response.json()[0]['starts_at']
+        self.assertGreaterEqual(
+            datetime.fromisoformat(first.replace('Z', '+00:00')),
+            timezone.now() + timedelta(minutes=60) - timedelta(seconds=5),
+        )
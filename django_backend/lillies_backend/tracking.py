@@ -0,0 +1,89 @@
+import copy
+
+from django.db.models.fields.files import FieldFile
+
+
+class TrackedFieldsMixin:
+    """
+    Model mixin that snapshots the column values an instance was loaded with
+    and exposes ``changed_fields``. Saving an existing row then writes only
+    the changed columns (plus ``auto_now`` ones) via ``update_fields``, so
+    post_save receivers see exactly what changed without reading the row
+    again.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    def _tracked_value(self, field):
+        value = getattr(self, field.attname)
+        if isinstance(value, FieldFile):
+            # A freshly assigned upload is a change even if its name matches
+            return (value.name or '', value._committed)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def _snapshot_fields(self, names=None):
+        """
+        Record current values as the loaded state, for every loaded field or
+        only for ``names`` (field names or attnames)
+        """
+        if names is None:
+            deferred = self.get_deferred_fields()
+            self._loaded_values = {
+                field.attname: self._tracked_value(field)
+                for field in self._meta.concrete_fields
+                if field.attname not in deferred
+            }
+            return
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return
+        for field in self._meta.concrete_fields:
+            if field.name in names or field.attname in names:
+                loaded[field.attname] = self._tracked_value(field)
+
+    @property
+    def changed_fields(self):
+        """
+        Names of concrete fields that differ from the loaded row. Unsaved
+        instances report every field.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        fields = self._meta.concrete_fields
+        if self._state.adding or loaded is None:
+            return {field.name for field in fields}
+        changed = set()
+        for field in fields:
+            if field.attname in loaded:
+                if self._tracked_value(field) != loaded[field.attname]:
+                    changed.add(field.name)
+            elif field.attname in self.__dict__:
+                # Deferred at load time but assigned since; assume it changed
+                changed.add(field.name)
+        return changed
+
+    def has_changed(self, *names):
+        return bool(self.changed_fields.intersection(names))
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and getattr(self, '_loaded_values', None) is not None
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not args
+        ):
+            auto_now = {field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)}
+            kwargs['update_fields'] = self.changed_fields | auto_now
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self._snapshot_fields(None if update_fields is None else set(update_fields))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Loading one deferred field goes through here too, so only the
+        # refreshed fields may be marked clean
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_fields(None if fields is None else set(fields))
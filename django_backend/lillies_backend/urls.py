@@ -3,7 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet, OrderViewSet, dashboard_stats, public_menu_categories, public_menu_items
+from .views import CategoryViewSet, ProductViewSet, OrderViewSet, dashboard_stats, public_menu_categories, public_menu_items, menu_suggest, menu_facets, menu_slots, serve_media, media_upload, checkout, kitchen_queue, event_stream, stock_reservations, cart_detail, cart_items, cart_merge
 from api.views import health_check
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -59,10 +59,23 @@ urlpatterns = [
     path('api/auth/', include('users.urls')),
     path('api/admin/', include('api.urls')),
     path('api/dashboard/stats/', dashboard_stats, name='dashboard-stats'),
+    path('api/checkout/', checkout, name='checkout'),
+    path('api/kitchen/queue/', kitchen_queue, name='kitchen-queue'),
+    path('api/events/', event_stream, name='event-stream'),
+    path('api/reservations/', stock_reservations, name='stock-reservations'),
+    path('api/cart/', cart_detail, name='cart'),
+    path('api/cart/items/', cart_items, name='cart-items'),
+    path('api/cart/merge/', cart_merge, name='cart-merge'),
     
     # Public menu endpoints (no authentication required)
     path('api/menu/categories/', public_menu_categories, name='public-menu-categories'),
     path('api/menu/items/', public_menu_items, name='public-menu-items'),
+    path('api/menu/suggest/', menu_suggest, name='public-menu-suggest'),
+    path('api/menu/facets/', menu_facets, name='public-menu-facets'),
+    path('api/menu/slots/', menu_slots, name='public-menu-slots'),
+
+    # Direct uploads for the filesystem media storage
+    path('api/media/uploads/<str:token>/', media_upload, name='media-upload'),
     
     # Health check endpoint
     path('api/health/', health_check, name='health-check'),
@@ -74,4 +87,4 @@ urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Serve media files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
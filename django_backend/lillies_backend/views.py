@@ -1,21 +1,60 @@
 from rest_framework import viewsets, permissions, status, parsers
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
-from .models import Category, Product, Order, OrderItem
-from .serializers import CategorySerializer, ProductSerializer, OrderSerializer, OrderItemSerializer
+from .models import Category, Product, Order, OrderItem, StockReservation
+from .serializers import CategorySerializer, CategoryWithProductsSerializer, ProductSerializer, OrderSerializer, OrderSummarySerializer, OrderItemSerializer, BulkPricingSerializer, ImageUploadSerializer, ImageConfirmSerializer, CheckoutSerializer, PickupSlotSerializer, StockHoldSerializer, StockReservationSerializer, CartLineSerializer
+from . import menu_cache
+from .conditional import catalog_condition, catalog_conditional_methods
+from .search import ProductSearchFilter
+from . import allergens, availability, bulk, carts, checkout as checkout_service, events, facets, kitchen, orders, pricing, reservations, slots, suggest
+from .pagination import CreatedAtCursorPagination, IdCursorPagination
+from .fieldsets import SparseFieldsetViewMixin, requested_fieldset, sparse_queryset
+from .idempotency import idempotent
+from .storage import IMMUTABLE_CACHE_CONTROL, UPLOAD_SIGNING_SALT, content_addressed_name, is_content_addressed, upload_expiry
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
 from django.views import View
-from django.http import JsonResponse
+from django.views.static import serve
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from django.core import signing
+from django.core.files import File
+from django.conf import settings
+import asyncio
+import hashlib
+import tempfile
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db import models
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.db import transaction
 from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
 
+@catalog_conditional_methods('list', 'retrieve')
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+
+    def expand_products(self):
+        return self.request.query_params.get('expand') == 'products'
+
+    def get_queryset(self):
+        queryset = super().get_queryset().with_product_counts()
+        if self.expand_products():
+            queryset = queryset.with_active_products()
+        return queryset
+
+    def get_serializer_class(self):
+        if self.request.method in permissions.SAFE_METHODS and self.expand_products():
+            return CategoryWithProductsSerializer
+        return super().get_serializer_class()
     
     def get_permissions(self):
         """
@@ -25,19 +64,25 @@ class CategoryViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+@catalog_conditional_methods('list', 'retrieve')
+class ProductViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.select_related('category')
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ProductSearchFilter runs last so relevance ordering can replace the default ordering
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ProductSearchFilter]
     filterset_fields = ['category', 'active', 'is_featured']
-    search_fields = ['name', 'description', 'sku']
     ordering_fields = ['name', 'price', 'created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = CreatedAtCursorPagination
     
     def get_permissions(self):
         """
-        Allow GET requests for anyone, but require authentication for other methods
+        Allow GET requests for anyone, but require authentication for other methods.
+        Actions declaring their own permission_classes (the staff-only bulk and
+        image tools) use those instead.
         """
+        if 'permission_classes' in getattr(getattr(self, self.action or '', None), 'kwargs', {}):
+            return super().get_permissions()
         if self.request.method in permissions.SAFE_METHODS:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
@@ -47,25 +92,17 @@ class ProductViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        search = self.request.query_params.get('search', '')
-        if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search) |
-                models.Q(description__icontains=search) |
-                models.Q(category__name__icontains=search)
-            )
-        return queryset
+    def paginate_queryset(self, queryset):
+        # Relevance-ranked search results are already capped by the search
+        # index, and cursor pagination would re-sort them by created_at
+        if self.request.query_params.get('search') and not self.request.query_params.get('ordering'):
+            return None
+        return super().paginate_queryset(queryset)
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         
-        # Log the request data for debugging
-        print(f"Request data: {request.data}")
-        print(f"Request files: {request.FILES}")
-        
         try:
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
             serializer.is_valid(raise_exception=True)
@@ -78,48 +115,459 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['get', 'post'], url_path='bulk',
+            parser_classes=[parsers.MultiPartParser], permission_classes=[permissions.IsAdminUser])
+    def bulk(self, request):
+        """
+        GET streams every product as CSV or JSON Lines (?type=csv|jsonl).
+        POST upserts products by sku from an uploaded ``file`` and reports
+        per-row validation errors.
+        """
+        if request.method == 'GET':
+            file_type = request.query_params.get('type', 'csv')
+            if file_type not in ('csv', 'jsonl'):
+                return Response({"detail": "type must be csv or jsonl"}, status=status.HTTP_400_BAD_REQUEST)
+            rows = bulk.export_rows()
+            if file_type == 'csv':
+                response = StreamingHttpResponse(bulk.stream_csv(rows), content_type='text/csv')
+            else:
+                response = StreamingHttpResponse(bulk.stream_jsonl(rows), content_type='application/x-ndjson')
+            response['Content-Disposition'] = f'attachment; filename="products.{file_type}"'
+            return response
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+        file_type = request.data.get('type') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_type not in ('csv', 'jsonl'):
+            return Response({"detail": "type must be csv or jsonl"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = bulk.import_products(bulk.read_rows(upload, file_type))
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"detail": f"Could not read file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], url_path='bulk-pricing',
+            permission_classes=[permissions.IsAdminUser])
+    def bulk_pricing(self, request):
+        """
+        Apply discount rules (by category and/or sku list, percentage, absolute
+        or clear) atomically and return the resulting price diff
+        """
+        serializer = BulkPricingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        diff = pricing.apply_pricing_rules(
+            serializer.validated_data['rules'],
+            dry_run=serializer.validated_data['dry_run'],
+        )
+        return Response({
+            'dry_run': serializer.validated_data['dry_run'],
+            'changed': len(diff),
+            'changes': diff,
+        })
+
+    @action(detail=True, methods=['post'], url_path='image-upload',
+            permission_classes=[permissions.IsAdminUser])
+    def image_upload(self, request, pk=None):
+        """
+        Return where to PUT a new image (a presigned bucket URL, or a signed
+        local URL with the filesystem storage). Nothing needs uploading when
+        the same content is already stored.
+        """
+        self.get_object()
+        serializer = ImageUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sha256 = serializer.validated_data['sha256']
+        content_type = serializer.validated_data['content_type']
+
+        field = Product._meta.get_field('image')
+        name = content_addressed_name(
+            field.upload_to.rstrip('/'), sha256, ImageUploadSerializer.CONTENT_TYPES[content_type]
+        )
+        if field.storage.exists(name):
+            # Keep sweep_media from deleting it before image-confirm lands
+            field.storage.touch(name)
+            return Response({'name': name, 'exists': True, 'upload': None})
+
+        upload = field.storage.upload_target(name, sha256, content_type, upload_expiry())
+        upload['url'] = request.build_absolute_uri(upload['url'])
+        return Response({'name': name, 'exists': False, 'upload': upload})
+
+    @action(detail=True, methods=['post'], url_path='image-confirm',
+            permission_classes=[permissions.IsAdminUser])
+    def image_confirm(self, request, pk=None):
+        """
+        Point the product at an image uploaded via image-upload
+        """
+        product = self.get_object()
+        serializer = ImageConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        name = serializer.validated_data['name']
+
+        field = Product._meta.get_field('image')
+        if not name.startswith(field.upload_to) or not is_content_addressed(name):
+            return Response({"detail": "Not an uploaded product image"}, status=status.HTTP_400_BAD_REQUEST)
+        if not field.storage.exists(name):
+            return Response({"detail": "Upload not found"}, status=status.HTTP_400_BAD_REQUEST)
+
+        product.image = name
+        product.save()
+        return Response(self.get_serializer(product).data)
+
 # Add these dedicated endpoints for the public menu
+@catalog_condition
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_menu_categories(request):
     """
     Public endpoint to get all active menu categories
     """
-    categories = Category.objects.all()
-    serializer = CategorySerializer(categories, many=True)
-    return Response(serializer.data)
+    expand = request.query_params.get('expand') == 'products'
+
+    def build():
+        categories = Category.objects.with_product_counts()
+        serializer_class = CategorySerializer
+        if expand:
+            categories = categories.with_active_products()
+            serializer_class = CategoryWithProductsSerializer
+        return list(serializer_class(categories, many=True, context={'request': request}).data)
 
+    payload = menu_cache.get_or_build(['categories', request.get_host(), 'expanded' if expand else 'lean'], build)
+    if expand:
+        levels = availability.stock_levels()
+        for category in payload:
+            availability.overlay(category.get('products', []), levels)
+    return Response(payload)
+
+@catalog_condition
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_menu_items(request):
     """
     Public endpoint to get all active menu items, 
-    optionally filtered by category
+    optionally filtered by category and excluding allergens
+    (?exclude_allergens=peanut,dairy)
     """
     category_id = request.query_params.get('category', None)
-    products = Product.objects.filter(active=True)
-    
-    if category_id:
-        products = products.filter(category_id=category_id)
-    
-    serializer = ProductSerializer(products, many=True, context={'request': request})
-    return Response(serializer.data)
+    fields, omit = requested_fieldset(request)
+    excluded = sorted(set(
+        allergens.normalize(name) for name in request.query_params.get('exclude_allergens', '').split(',')
+        if name.strip()
+    ))
+
+    def build():
+        products = Product.objects.filter(active=True).select_related('category')
+        if category_id:
+            products = products.filter(category_id=category_id)
+        if excluded:
+            # Anti-join against the indexed product/allergen through table
+            products = products.exclude(allergen_tags__in=allergens.allergen_ids(excluded))
+        serializer = ProductSerializer(products, many=True, context={'request': request})
+        if fields is not None or omit is not None:
+            serializer.instance = sparse_queryset(products, serializer.child)
+        return list(serializer.data)
+
+    # Image URLs are absolute, so payloads are cached per host
+    fieldset = ','.join(sorted(fields or [])) + '-' + ','.join(sorted(omit or []))
+    payload = menu_cache.get_or_build(
+        ['items', request.get_host(), category_id or 'all', fieldset, ','.join(excluded)], build
+    )
+    return Response(availability.overlay(payload))
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def menu_suggest(request):
+    """
+    Public typeahead endpoint returning the top product and category
+    matches for the ``q`` prefix, most popular first
+    """
+    prefix = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    return Response(suggest.get_index().suggest(prefix, limit))
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def menu_facets(request):
+    """
+    Public endpoint returning the products matching the requested dietary
+    facets (e.g. ?is_vegan=true&category=2) with per-facet and per-category
+    counts. Only active products are considered unless ?active= is given.
+    """
+    filters = {'active': True}
+    for facet in facets.FACETS:
+        value = request.query_params.get(facet)
+        if value is not None:
+            filters[facet] = value.lower() in ('1', 'true', 'yes')
+
+    category_id = request.query_params.get('category')
+    try:
+        category_id = int(category_id) if category_id else None
+    except ValueError:
+        return Response({"detail": "category must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    index = facets.get_index()
+    bits = index.select(filters, category_id)
+    data = index.summarize(bits)
+    data['product_ids'] = index.product_ids(bits)
+    return Response(data)
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all()
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def menu_slots(request):
+    """
+    Public endpoint listing the upcoming pickup slots and the preparation
+    minutes each can still take, from the first one the kitchen can still
+    serve given the queued orders. ?available=true leaves out full slots.
+    """
+    upcoming = slots.available_slots(ready_at=kitchen.ready_at())
+    if request.query_params.get('available', '').lower() in ('1', 'true', 'yes'):
+        upcoming = [slot for slot in upcoming if slot.remaining_minutes]
+    return Response(PickupSlotSerializer(upcoming, many=True).data)
+
+def order_items_prefetch():
+    # Only the product columns OrderItemSerializer reads are joined in
+    return models.Prefetch('items', queryset=OrderItem.objects.select_related('product').only(
+        'id', 'order', 'product', 'quantity', 'price', 'product__name', 'product__price'
+    ))
+
+class OrderViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    queryset = Order.objects.prefetch_related(order_items_prefetch())
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        if not self.request.user.is_staff:
-            queryset = queryset.filter(user=self.request.user)
+        if 'items' not in self.get_serializer().fields:
+            queryset = queryset.prefetch_related(None)
+        if self.action == 'mine' or not self.request.user.is_staff:
+            queryset = queryset.filter(customer=self.request.user)
         return queryset
 
+    @idempotent('order-create')
+    def create(self, request, *args, **kwargs):
+        # Same path as /api/checkout/, so totals and stock are never taken
+        # from the client
+        return _place_order(request)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except orders.TransitionError as e:
+            return Response({"detail": e.message}, status=e.status)
+
+    def perform_update(self, serializer):
+        """
+        Status changes go through orders.transition() so they follow the
+        state machine; customers may only cancel their own orders.
+        """
+        to_status = serializer.validated_data.pop('status', None)
+        order = serializer.instance
+        if to_status is not None and to_status != order.status:
+            if not self.request.user.is_staff and to_status != 'cancelled':
+                raise PermissionDenied("Only staff can move an order through the kitchen")
+        with transaction.atomic():
+            if to_status is not None:
+                orders.transition(order, to_status)
+            serializer.save()
+
+    @action(detail=False, methods=['get'])
+    def mine(self, request):
+        """
+        The signed-in customer's orders, newest first: one query for the page
+        of orders and one for their items with product names. ?summary=1
+        returns only the status and total of each order in a single query.
+        """
+        if request.query_params.get('summary') not in ('1', 'true'):
+            return self.list(request)
+        queryset = Order.objects.filter(customer=request.user).values(*OrderSummarySerializer.Meta.fields)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(OrderSummarySerializer(page, many=True).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@idempotent('checkout')
+def checkout(request):
+    """
+    Turn a cart into an order: prices come from the catalog and stock is
+    decremented atomically. Answers 409 with the sold-out product ids when
+    any line cannot be fulfilled.
+    """
+    return _place_order(request)
+
+def _place_order(request):
+    serializer = CheckoutSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = dict(serializer.validated_data)
+    items = data.pop('items', None)
+    from_cart = items is None
+    if from_cart:
+        items = carts.items(carts.get_cart(reservations.user_holder(request.user)))
+    try:
+        order = checkout_service.place_order(request.user, items, **data)
+    except checkout_service.CheckoutError as e:
+        return Response({"detail": e.message, "products": e.product_ids}, status=e.status)
+    if from_cart:
+        carts.clear(reservations.user_holder(request.user))
+
+    order = Order.objects.prefetch_related(order_items_prefetch()).get(pk=order.pk)
+    return Response(OrderSerializer(order, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def kitchen_queue(request):
+    """
+    Open (pending and processing) orders with their items, earliest due
+    first. Polled by the kitchen screens, so it only reads the partial index
+    over open orders.
+    """
+    queue = orders.kitchen_queue().prefetch_related(order_items_prefetch())[:orders.KITCHEN_QUEUE_LIMIT]
+    return Response(OrderSerializer(queue, many=True, context={'request': request}).data)
+
+def _stream_user(request):
+    # EventSource cannot send headers, so browsers pass the access token as ?token=
+    authentication = JWTAuthentication()
+    token = request.GET.get('token')
+    if token:
+        return authentication.get_user(authentication.get_validated_token(token))
+    result = authentication.authenticate(request)
+    return result[0] if result else AnonymousUser()
+
+@require_http_methods(['GET'])
+async def event_stream(request):
+    """
+    Server-sent events for new orders, order status changes and sold-out
+    products, so dashboards and kitchen screens hold one connection instead
+    of polling. Staff receive every event, customers those for their own
+    orders plus public ones, anonymous clients public ones only. ?types=
+    narrows the event types. Only the ASGI application can serve it.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Event streams are only served by the ASGI application"}, status=501)
+    try:
+        user = await sync_to_async(_stream_user)(request)
+    except (AuthenticationFailed, InvalidToken):
+        return JsonResponse({"detail": "Invalid or expired token"}, status=401)
+
+    types = set(filter(None, request.GET.get('types', '').split(','))) or set(events.EVENT_TYPES)
+    unknown = types.difference(events.EVENT_TYPES)
+    if unknown:
+        return JsonResponse({"detail": f"Unknown event types: {', '.join(sorted(unknown))}"}, status=400)
+    is_staff = user.is_staff
+    user_id = user.pk if user.is_authenticated else None
+
+    def accept(event):
+        if event['type'] not in types:
+            return False
+        return is_staff or event['customer'] is None or event['customer'] == user_id
+
+    async def stream():
+        subscription = events.subscribe(accept)
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield events.format_sse(event)
+        finally:
+            events.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _cart_holder_required():
+    return Response(
+        {"detail": f"Sign in or send an {reservations.CART_TOKEN_HEADER} header"},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+@api_view(['GET', 'POST', 'DELETE'])
+@permission_classes([AllowAny])
+def stock_reservations(request):
+    """
+    GET lists the cart's stock holds, POST sets one hold ({product, quantity},
+    quantity 0 releases it) and DELETE releases them all. The cart is the
+    signed-in user or the anonymous X-Cart-Token header.
+    """
+    holder = reservations.holder_for(request)
+    if holder is None:
+        return _cart_holder_required()
+
+    if request.method == 'POST':
+        serializer = StockHoldSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            reservations.hold(holder, serializer.validated_data['product'], serializer.validated_data['quantity'])
+        except reservations.ReservationError as e:
+            return Response({"detail": e.message, "products": e.product_ids}, status=status.HTTP_409_CONFLICT)
+    elif request.method == 'DELETE':
+        reservations.release(holder)
+
+    holds = StockReservation.objects.filter(holder=holder).select_related('product').only(
+        'product_id', 'quantity', 'expires_at', 'product__stock', 'product__reserved'
+    ).order_by('product_id')
+    return Response(StockReservationSerializer(holds, many=True).data)
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([AllowAny])
+def cart_detail(request):
+    """
+    The caller's server-side cart, repriced if the catalog changed. DELETE
+    empties it.
+    """
+    holder = reservations.holder_for(request)
+    if holder is None:
+        return _cart_holder_required()
+    if request.method == 'DELETE':
+        carts.clear(holder)
+    return Response(carts.serialize(carts.get_cart(holder)))
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def cart_items(request):
+    """
+    Set the quantity of one product in the cart ({product, quantity}; 0 removes it)
+    """
+    holder = reservations.holder_for(request)
+    if holder is None:
+        return _cart_holder_required()
+    serializer = CartLineSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        cart = carts.set_line(holder, serializer.validated_data['product'], serializer.validated_data['quantity'])
+    except carts.CartError as e:
+        return Response({"detail": e.message, "products": e.product_ids}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(carts.serialize(cart))
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cart_merge(request):
+    """
+    Merge the anonymous cart named by X-Cart-Token into the signed-in user's cart
+    """
+    anonymous = reservations.token_holder(request)
+    if anonymous is None:
+        return Response(
+            {"detail": f"Send the anonymous cart's {reservations.CART_TOKEN_HEADER} header"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(carts.serialize(carts.merge(anonymous, reservations.user_holder(request.user))))
+
 class OrderItemViewSet(viewsets.ModelViewSet):
-    queryset = OrderItem.objects.all()
+    queryset = OrderItem.objects.select_related('product')
     serializer_class = OrderItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = IdCursorPagination
 
 class AdminDashboardView(View):
     def get(self, request, *args, **kwargs):
@@ -137,43 +585,28 @@ def dashboard_stats(request):
         total_orders = Order.objects.count()
         
         # Get recent orders (last 10)
-        recent_orders = Order.objects.order_by('-created_at')[:10]
+        recent_orders = Order.objects.prefetch_related(order_items_prefetch()).order_by('-created_at')[:10]
         
         # Get recent products (last 10)
-        recent_products = Product.objects.order_by('-created_at')[:10]
+        recent_products = Product.objects.select_related('category').order_by('-created_at')[:10]
         
         # Get low stock products (products with stock less than 5)
         low_stock_products = Product.objects.filter(stock__lt=5).values('id', 'name', 'stock')
         
         # Get all categories with product count
-        categories_with_count = []
-        categories = Category.objects.all()
-        for category in categories:
-            product_count = Product.objects.filter(category=category).count()
-            cat_data = CategorySerializer(category).data
-            cat_data['product_count'] = product_count
-            categories_with_count.append(cat_data)
-        
-        # Calculate category sales
-        category_sales = []
+        categories = Category.objects.with_product_counts()
+        categories_with_count = CategorySerializer(categories, many=True).data
         
-        for category in categories:
-            # Get products in this category
-            products = Product.objects.filter(category=category)
-            
-            # Count orders with these products
-            product_ids = products.values_list('id', flat=True)
-            order_items = OrderItem.objects.filter(product_id__in=product_ids)
-            
-            # Calculate total sales for this category
-            sales = order_items.aggregate(
-                total=Sum('price', default=0)
-            )['total'] or 0
-            
-            category_sales.append({
-                'category': category.name,
-                'sales': float(sales),
-            })
+        # Calculate category sales in one grouped query
+        category_sales = [
+            {
+                'category': category['name'],
+                'sales': float(category['sales']),
+            }
+            for category in Category.objects.annotate(
+                sales=Sum('products__orderitem__price', default=0)
+            ).values('name', 'sales')
+        ]
         
         # Format data for API response
         response_data = {
@@ -195,3 +628,43 @@ def dashboard_stats(request):
             {"detail": "Failed to generate dashboard statistics"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """
+    Development media view; content-addressed files are marked immutable
+    """
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if is_content_addressed(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+def media_upload(request, token):
+    """
+    Receive a direct upload for the filesystem storage. The signed token
+    fixes the name and hash, so the body must hash to what was requested.
+    """
+    try:
+        target = signing.loads(token, salt=UPLOAD_SIGNING_SALT, max_age=upload_expiry())
+    except signing.BadSignature:
+        return JsonResponse({"detail": "Invalid or expired upload URL"}, status=403)
+
+    limit = getattr(settings, 'MEDIA_UPLOAD_MAX_BYTES', 10 * 1024 * 1024)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as body:
+        while chunk := request.read(64 * 1024):
+            size += len(chunk)
+            if size > limit:
+                return JsonResponse({"detail": "Upload too large"}, status=413)
+            digest.update(chunk)
+            body.write(chunk)
+        if digest.hexdigest() != target['sha256']:
+            return JsonResponse({"detail": "Content does not match the requested hash"}, status=400)
+
+        storage = Product._meta.get_field('image').storage
+        name = storage.save(target['name'], File(body, name=target['name']))
+    return JsonResponse({'name': name}, status=201)
@@ -37,6 +37,11 @@ class CustomUser(AbstractUser):
     REQUIRED_FIELDS = ['name']
     
     objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='user_created_id_idx'),
+        ]
     
     def __str__(self):
         return self.email
\ No newline at end of file
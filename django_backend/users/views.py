@@ -3,8 +3,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth import get_user_model
 from .serializers import UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer
+from lillies_backend.pagination import CreatedAtCursorPagination
+from lillies_backend.fieldsets import SparseFieldsetViewMixin
+from lillies_backend import carts, reservations
 import traceback
 import json
 
@@ -13,6 +17,20 @@ User = get_user_model()
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        # Carry an anonymous cart (X-Cart-Token) over to the account
+        anonymous = reservations.token_holder(request)
+        if anonymous:
+            carts.merge(anonymous, reservations.user_holder(serializer.user))
+
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
@@ -62,20 +80,13 @@ class RegisterView(generics.CreateAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class UserListView(generics.ListAPIView):
+class UserListView(SparseFieldsetViewMixin, generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = CreatedAtCursorPagination
 
-    def get_queryset(self):
-        # Adding print statement for debugging
-        users = User.objects.all()
-        print(f"UserListView: Found {users.count()} users")
-        for user in users:
-            print(f"User ID: {user.id}, Email: {user.email}, Is Staff: {user.is_staff}, Is Superuser: {user.is_superuser}")
-        return users
-
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (permissions.IsAuthenticated,)